@@ -54,6 +54,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'sqs_queue.profiling.ProfilingMiddleware',
+    'sqs_queue.resilience.DeadlineMiddleware',
 ]
 
 ROOT_URLCONF = 'SQS_DEMO.urls'
@@ -132,3 +134,94 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# SQS locations
+# Regions and named AWS credential profiles queues may be created in, besides AWS_REGION and the default credentials.
+
+SQS_ALLOWED_REGIONS = [region.strip() for region in os.getenv("SQS_ALLOWED_REGIONS", "").split(",") if region.strip()]
+SQS_ALLOWED_PROFILES = [
+    profile.strip() for profile in os.getenv("SQS_ALLOWED_PROFILES", "").split(",") if profile.strip()
+]
+
+
+# Dead-letter redrive
+# Requests to the redrive endpoint are clamped to REDRIVE_MAX_WORKERS pipelines and REDRIVE_MAX_MESSAGES messages.
+
+REDRIVE_MAX_WORKERS = int(os.getenv("REDRIVE_MAX_WORKERS", 16))
+REDRIVE_MAX_MESSAGES = int(os.getenv("REDRIVE_MAX_MESSAGES", 10000))
+
+
+# Synthetic orders
+# Requests to the synthetic orders endpoint may send at most SYNTHETIC_MAX_COUNT orders with SYNTHETIC_MAX_WORKERS
+# senders, bigger loads should use the send_synthetic_orders command.
+
+SYNTHETIC_MAX_COUNT = int(os.getenv("SYNTHETIC_MAX_COUNT", 10000))
+SYNTHETIC_MAX_WORKERS = int(os.getenv("SYNTHETIC_MAX_WORKERS", 16))
+
+
+# Sharded queues
+# A sharded queue has at most SHARD_MAX_COUNT shards, each backed by a source and a dead-letter SQS queue.
+
+SHARD_MAX_COUNT = int(os.getenv("SHARD_MAX_COUNT", 32))
+
+
+# Lambda/SNS webhook ingestion
+# Payloads are processed by WEBHOOK_WORKERS threads fed by a queue of at most WEBHOOK_QUEUE_SIZE payloads.
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 4))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 100))
+WEBHOOK_RETRY_AFTER_SECONDS = int(os.getenv("WEBHOOK_RETRY_AFTER_SECONDS", 5))
+LAMBDA_MESSAGE_PROCESSING_SECONDS = int(os.getenv("LAMBDA_MESSAGE_PROCESSING_SECONDS", 60))
+
+
+# Processing ledger
+# Completion records are buffered and bulk inserted every LEDGER_BATCH_SIZE records or LEDGER_FLUSH_SECONDS.
+
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", 500))
+LEDGER_FLUSH_SECONDS = float(os.getenv("LEDGER_FLUSH_SECONDS", 2))
+
+
+# Profiling
+# Requests are profiled when they send the X-Profile header (if PROFILING_HEADER_ENABLED) or are sampled by
+# PROFILING_SAMPLE_RATE; webhook consumers are sampled by PROFILING_CONSUMER_SAMPLE_RATE.
+# PROFILING_MODE is "cprofile" (deterministic) or "sample" (stack sampling every PROFILING_SAMPLE_INTERVAL seconds).
+
+PROFILING_HEADER_ENABLED = os.getenv("PROFILING_HEADER_ENABLED", "False") == "True"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+PROFILING_CONSUMER_SAMPLE_RATE = float(os.getenv("PROFILING_CONSUMER_SAMPLE_RATE", 0))
+PROFILING_MODE = os.getenv("PROFILING_MODE", "cprofile")
+PROFILING_SAMPLE_INTERVAL = float(os.getenv("PROFILING_SAMPLE_INTERVAL", 0.005))
+PROFILING_DIR = os.getenv("PROFILING_DIR", str(BASE_DIR / "profiles"))
+
+
+# SQS timeouts, circuit breakers and request deadlines
+# A breaker per queue and operation opens after SQS_BREAKER_FAILURE_THRESHOLD consecutive errors or calls slower than
+# SQS_BREAKER_LATENCY_SECONDS (long-poll wait excluded) and lets a trial call through after SQS_BREAKER_RESET_SECONDS.
+# Each request may spend at most SQS_REQUEST_DEADLINE_SECONDS in SQS calls. Calls are made with a read timeout of
+# SQS_SHORT_READ_TIMEOUT plus their long-poll wait, so an attempt takes at most SQS_CONNECT_TIMEOUT plus that. Long-poll
+# waits are shortened, and attempts and retries (with their backoff) only made, when this fits in what is left after
+# SQS_DEADLINE_MARGIN_SECONDS.
+
+SQS_CONNECT_TIMEOUT = float(os.getenv("SQS_CONNECT_TIMEOUT", 2))
+SQS_SHORT_READ_TIMEOUT = float(os.getenv("SQS_SHORT_READ_TIMEOUT", 3))
+SQS_MAX_ATTEMPTS = int(os.getenv("SQS_MAX_ATTEMPTS", 2))
+SQS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("SQS_BREAKER_FAILURE_THRESHOLD", 5))
+SQS_BREAKER_LATENCY_SECONDS = float(os.getenv("SQS_BREAKER_LATENCY_SECONDS", 2))
+SQS_BREAKER_RESET_SECONDS = float(os.getenv("SQS_BREAKER_RESET_SECONDS", 30))
+SQS_REQUEST_DEADLINE_SECONDS = float(os.getenv("SQS_REQUEST_DEADLINE_SECONDS", 15))
+SQS_DEADLINE_MARGIN_SECONDS = float(os.getenv("SQS_DEADLINE_MARGIN_SECONDS", 1))
+
+
+# Scheduled messages
+# Messages due further ahead than SQS allows are stored and released by the run_scheduler command. It loads messages
+# due within SCHEDULER_HORIZON_SECONDS into a timing wheel with SCHEDULER_TICK_SECONDS slots, picks up newly scheduled
+# ones every SCHEDULER_REFRESH_SECONDS and retries failed sends after SCHEDULER_RETRY_SECONDS. Messages may be scheduled
+# at most SCHEDULER_MAX_DELAY_SECONDS ahead.
+
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", 1))
+SCHEDULER_HORIZON_SECONDS = float(os.getenv("SCHEDULER_HORIZON_SECONDS", 600))
+SCHEDULER_REFRESH_SECONDS = float(os.getenv("SCHEDULER_REFRESH_SECONDS", 5))
+SCHEDULER_RETRY_SECONDS = float(os.getenv("SCHEDULER_RETRY_SECONDS", 30))
+SCHEDULER_CHUNK_SIZE = int(os.getenv("SCHEDULER_CHUNK_SIZE", 5000))
+SCHEDULER_MAX_DELAY_SECONDS = int(os.getenv("SCHEDULER_MAX_DELAY_SECONDS", 365 * 24 * 60 * 60))
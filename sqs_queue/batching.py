@@ -0,0 +1,94 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from utilities.utils import RateLimiter
+from .resilience import DeadlineExceeded, attempt_seconds, bind_deadline, deadline_allows
+
+
+MAX_BATCH_SIZE = 10
+
+
+def batched(iterable, size=MAX_BATCH_SIZE):
+    """
+    Function to split an iterable into lists of at most size items without materialising it.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def send_message_batches(sqs, queue_url, batches, workers=4, rate_limit=None, on_progress=None):
+    """
+    Function to send pre-built send_message_batch entry lists in parallel with bounded memory.
+
+    queue_url may also be a list of urls, e.g. the shards of a queue, which batches are spread over round robin.
+    Under a request deadline no batch is started once one send_message_batch call no longer fits, and the result has
+    deadline_reached set.
+    """
+    queue_urls = itertools.cycle([queue_url] if isinstance(queue_url, str) else queue_url)
+    limiter = RateLimiter(rate_limit, burst=max(rate_limit, MAX_BATCH_SIZE)) if rate_limit else None
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    lock = threading.Lock()
+    totals = {"sent": 0, "failed": 0, "deadline_reached": False}
+    started_at = time.monotonic()
+
+    def snapshot():
+        elapsed = time.monotonic() - started_at
+        return {
+            "sent": totals["sent"],
+            "failed": totals["failed"],
+            "elapsed_seconds": round(elapsed, 3),
+            "messages_per_second": round(totals["sent"] / elapsed, 2) if elapsed > 0 else 0.0,
+            "deadline_reached": totals["deadline_reached"],
+        }
+
+    def send(target_url, entries):
+        try:
+            try:
+                response = sqs.send_message_batch(QueueUrl=target_url, Entries=entries)
+            except DeadlineExceeded:
+                with lock:
+                    totals["failed"] += len(entries)
+                    totals["deadline_reached"] = True
+                return
+            sent = len(response.get("Successful", []))
+            with lock:
+                totals["sent"] += sent
+                totals["failed"] += len(entries) - sent
+                progress = snapshot()
+            if on_progress is not None:
+                on_progress(progress)
+        finally:
+            in_flight.release()
+
+    send = bind_deadline(send)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for entries in batches:
+            if limiter is not None:
+                limiter.acquire(len(entries))
+            if not deadline_allows(attempt_seconds()):
+                with lock:
+                    totals["deadline_reached"] = True
+                break
+            in_flight.acquire()
+            futures.append(executor.submit(send, next(queue_urls), entries))
+            # Drop references to completed futures so long replays keep constant memory.
+            if len(futures) >= workers * 4:
+                pending = []
+                for future in futures:
+                    if future.done():
+                        future.result()
+                    else:
+                        pending.append(future)
+                futures = pending
+        for future in futures:
+            future.result()
+
+    return snapshot()
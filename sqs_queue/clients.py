@@ -0,0 +1,151 @@
+import os
+import threading
+from functools import partial
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from django.db.models import Q
+
+from .resilience import MAX_WAIT_SECONDS, fit_wait_seconds, install_guards
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+
+class LocationNotAllowed(Exception):
+    """
+    Exception raised when a region or credential profile is not listed in SQS_ALLOWED_REGIONS/SQS_ALLOWED_PROFILES.
+    """
+
+
+class SQSClient(object):
+    """
+    Class for making every call with a read timeout of SQS_SHORT_READ_TIMEOUT plus its long-poll wait.
+
+    Receives are shortened to fit the request deadline first and then sent through a client built for that wait, one
+    per wait in seconds (at most 20), so a hung connection cannot outlast the deadline either.
+    """
+
+    def __init__(self, client, build_client):
+        self.client = client
+        self.build_client = build_client
+        self.long_poll_clients = {}
+        self.lock = threading.Lock()
+
+    def receive_message(self, **kwargs):
+        requested_seconds = kwargs.get("WaitTimeSeconds", MAX_WAIT_SECONDS)
+        wait_seconds = fit_wait_seconds(requested_seconds)
+        if wait_seconds != requested_seconds:
+            kwargs["WaitTimeSeconds"] = wait_seconds
+        return self._client_for_wait(wait_seconds).receive_message(**kwargs)
+
+    def _client_for_wait(self, wait_seconds):
+        if wait_seconds == 0:
+            return self.client
+        client = self.long_poll_clients.get(wait_seconds)
+        if client is None:
+            with self.lock:
+                client = self.long_poll_clients.get(wait_seconds)
+                if client is None:
+                    client = self.build_client(settings.SQS_SHORT_READ_TIMEOUT + wait_seconds)
+                    self.long_poll_clients[wait_seconds] = client
+        return client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class SQSClientRouter(object):
+    """
+    Class for handing out one pooled SQS client per region, credential profile and endpoint.
+    """
+
+    def __init__(self, max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS):
+        self.max_pool_connections = max_pool_connections
+        self.clients = {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    @property
+    def local_region(self):
+        return os.getenv("AWS_REGION")
+
+    def _get_session(self, profile):
+        # Clients built from the same session share exception classes, so views can match sqs.exceptions.*.
+        session = self.sessions.get(profile)
+        if session is None:
+            if profile:
+                session = boto3.session.Session(profile_name=profile)
+            else:
+                session = boto3.session.Session(
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                )
+            self.sessions[profile] = session
+        return session
+
+    def get_client(self, region=None, profile=None, endpoint_url=None):
+        """
+        Function to return the pooled client for a region and profile, creating it on first use.
+        """
+        key = (region or self.local_region, profile or None, endpoint_url)
+        # Clients are only built for configured locations, so callers cannot pick arbitrary credentials or grow the cache.
+        if key[0] != self.local_region and key[0] not in settings.SQS_ALLOWED_REGIONS:
+            raise LocationNotAllowed("region")
+        if key[1] is not None and key[1] not in settings.SQS_ALLOWED_PROFILES:
+            raise LocationNotAllowed("profile")
+
+        client = self.clients.get(key)
+        if client is None:
+            with self.lock:
+                client = self.clients.get(key)
+                if client is None:
+                    client = SQSClient(
+                        self._build_client(key, settings.SQS_SHORT_READ_TIMEOUT), partial(self._build_client, key)
+                    )
+                    self.clients[key] = client
+        return client
+
+    def _build_client(self, key, read_timeout):
+        region, profile, endpoint_url = key
+        client = self._get_session(profile).client(
+            "sqs",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=self.max_pool_connections,
+                connect_timeout=settings.SQS_CONNECT_TIMEOUT,
+                read_timeout=read_timeout,
+                retries={"max_attempts": settings.SQS_MAX_ATTEMPTS, "mode": "standard"},
+            ),
+        )
+        return install_guards(client)
+
+    def client_for_queue(self, queue, endpoint_url=None):
+        """
+        Function to return the pooled client for the region and profile recorded on a queue.
+        """
+        return self.get_client(region=queue.region, profile=queue.profile, endpoint_url=endpoint_url)
+
+    def local_replica(self, queue, region=None):
+        """
+        Function to return the queue with the same name in the given (default local) region, if one is registered.
+        """
+        region = region or self.local_region
+        if (queue.region or self.local_region) == region:
+            return queue
+
+        region_filter = Q(region=region)
+        if region == self.local_region:
+            region_filter |= Q(region__isnull=True)
+        replica = queue.__class__.objects.filter(region_filter, queue_name=queue.queue_name).first()
+        return replica or queue
+
+
+sqs_router = SQSClientRouter()
+# Bulk endpoints run up to max(REDRIVE_MAX_WORKERS, SYNTHETIC_MAX_WORKERS) threads, each needing a pooled connection
+# for the call in flight and one for the next.
+bulk_router = SQSClientRouter(
+    max_pool_connections=2 * max(settings.REDRIVE_MAX_WORKERS, settings.SYNTHETIC_MAX_WORKERS)
+)
@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utilities.utils import RateLimiter
+from .resilience import attempt_seconds, bind_deadline, deadline_allows
+
+
+DEAD_LETTER_SUFFIX = "-dlq"
+DEAD_LETTER_ATTRIBUTES = {
+    "MessageRetentionPeriod": "1209600",        # 14 days, longer than any source queue retention
+}
+DEFAULT_MAX_RECEIVE_COUNT = 5
+MAX_RECEIVE_COUNT_LIMIT = 1000      # 1-1000 receives allowed by SQS in a RedrivePolicy
+MAX_BATCH_SIZE = 10
+
+
+def create_dead_letter_queue(sqs, queue_name):
+    """
+    Function to create the dead-letter queue for a source queue and return its url, attributes and arn.
+    """
+    dead_letter_name = "{}{}".format(queue_name, DEAD_LETTER_SUFFIX)
+    attributes = dict(DEAD_LETTER_ATTRIBUTES)
+
+    response = sqs.create_queue(QueueName=dead_letter_name, Attributes=attributes)
+    queue_url = response.get("QueueUrl")
+
+    arn_response = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["QueueArn"])
+    queue_arn = arn_response.get("Attributes", {}).get("QueueArn")
+
+    return dead_letter_name, queue_url, attributes, queue_arn
+
+
+def build_redrive_policy(dead_letter_arn, max_receive_count=DEFAULT_MAX_RECEIVE_COUNT):
+    """
+    Function to build the RedrivePolicy attribute pointing a queue at its dead-letter queue.
+    """
+    return json.dumps({
+        "deadLetterTargetArn": dead_letter_arn,
+        "maxReceiveCount": str(max_receive_count),
+    })
+
+
+class RedriveProgress(object):
+    """
+    Class for tracking redrive progress shared between pipeline workers.
+    """
+
+    def __init__(self, max_messages=None):
+        self.max_messages = max_messages
+        self.claimed = 0
+        self.moved = 0
+        self.failed = 0
+        self.deadline_reached = False
+        self.started_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def claim(self, count):
+        """
+        Function to reserve up to count messages against the max_messages cap.
+        """
+        with self.lock:
+            if self.max_messages is None:
+                return count
+            granted = max(0, min(count, self.max_messages - self.claimed))
+            self.claimed += granted
+            return granted
+
+    def record(self, claimed, moved, failed):
+        """
+        Function to record the outcome of one batch and release unused claims.
+        """
+        with self.lock:
+            self.moved += moved
+            self.failed += failed
+            if self.max_messages is not None:
+                self.claimed -= claimed - moved
+            return self.snapshot()
+
+    def stop_at_deadline(self, claimed):
+        """
+        Function to release the claims of a worker that stops because the request deadline leaves no time for a batch.
+        """
+        with self.lock:
+            self.deadline_reached = True
+        self.record(claimed, 0, 0)
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "moved": self.moved,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "messages_per_second": round(self.moved / elapsed, 2) if elapsed > 0 else 0.0,
+            "deadline_reached": self.deadline_reached,
+        }
+
+
+def _redrive_worker(sqs, source_url, destination_url, progress, limiter, on_progress, wait_time_seconds, max_empty_polls):
+    """
+    Function to run one receive -> send_message_batch -> delete_message_batch pipeline until the source is drained.
+
+    Under a request deadline the pipeline stops before a receive, or before a send that could not be followed by its
+    delete, that would not fit; received messages that are not sent reappear after the visibility timeout.
+    """
+    empty_polls = 0
+    while empty_polls < max_empty_polls:
+        claimed = progress.claim(MAX_BATCH_SIZE)
+        if claimed == 0:
+            return
+        if not deadline_allows(attempt_seconds(wait_time_seconds)):
+            progress.stop_at_deadline(claimed)
+            return
+
+        response = sqs.receive_message(
+            QueueUrl=source_url,
+            MaxNumberOfMessages=claimed,
+            WaitTimeSeconds=wait_time_seconds,
+            MessageAttributeNames=["All"],
+        )
+        received = response.get("Messages", [])
+        if not received:
+            progress.record(claimed, 0, 0)
+            empty_polls += 1
+            continue
+        empty_polls = 0
+
+        if limiter is not None:
+            limiter.acquire(len(received))
+        if not deadline_allows(2 * attempt_seconds()):
+            progress.stop_at_deadline(claimed)
+            return
+
+        entries = []
+        for index, message in enumerate(received):
+            entry = {"Id": str(index), "MessageBody": message["Body"]}
+            if message.get("MessageAttributes"):
+                entry["MessageAttributes"] = message["MessageAttributes"]
+            entries.append(entry)
+
+        send_response = sqs.send_message_batch(QueueUrl=destination_url, Entries=entries)
+        sent_ids = [entry["Id"] for entry in send_response.get("Successful", [])]
+
+        # Messages that failed to send are left in the source queue and reappear after the visibility timeout.
+        if sent_ids:
+            sqs.delete_message_batch(
+                QueueUrl=source_url,
+                Entries=[
+                    {"Id": sent_id, "ReceiptHandle": received[int(sent_id)]["ReceiptHandle"]}
+                    for sent_id in sent_ids
+                ],
+            )
+
+        snapshot = progress.record(claimed, len(sent_ids), len(received) - len(sent_ids))
+        if on_progress is not None:
+            on_progress(snapshot)
+
+
+def redrive_messages(sqs, source_url, destination_url, workers=4, max_messages=None, rate_limit=None,
+                     on_progress=None, wait_time_seconds=2, max_empty_polls=2):
+    """
+    Function to move messages from source_url to destination_url using parallel batch pipelines.
+    """
+    progress = RedriveProgress(max_messages)
+    limiter = RateLimiter(rate_limit, burst=max(rate_limit, MAX_BATCH_SIZE)) if rate_limit else None
+
+    worker = bind_deadline(_redrive_worker)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                worker, sqs, source_url, destination_url, progress, limiter,
+                on_progress, wait_time_seconds, max_empty_polls,
+            )
+            for _ in range(workers)
+        ]
+        for future in futures:
+            future.result()
+
+    return progress.snapshot()
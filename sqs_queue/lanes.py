@@ -0,0 +1,222 @@
+import re
+import threading
+import time
+from collections import deque
+
+from django.db import transaction
+
+from utilities.utils import percentile
+from .clients import sqs_router
+from .dead_letter import DEAD_LETTER_SUFFIX, DEFAULT_MAX_RECEIVE_COUNT
+from .models import QueueLaneModel, QueueModel
+from .provisioning import STANDARD_QUEUE_ATTRIBUTES, create_standard_queue, discard_created_queues
+
+
+LATENCY_WINDOW = 1000
+# Priorities are part of the lane queue names, so they only use characters SQS allows in queue names.
+PRIORITY_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,30}")
+MAX_LANE_WEIGHT = 1000
+MAX_QUEUE_NAME_LENGTH = 80
+
+
+class LaneScheduler(object):
+    """
+    Class for picking which lane of a priority queue to poll next with smooth weighted round robin.
+
+    Each lane is polled first in proportion to its weight, so high-priority lanes are served most often while
+    low-priority lanes still get their turn; a lane found empty hands its turn to the next lane by weight.
+    """
+
+    def __init__(self):
+        self.current_weights = {}
+        self.lock = threading.Lock()
+
+    def order(self, queue, lanes):
+        if not lanes:
+            return lanes
+        with self.lock:
+            current = self.current_weights.setdefault(queue.id, {})
+            total = sum(lane.weight for lane in lanes)
+            for lane in lanes:
+                current[lane.id] = current.get(lane.id, 0) + lane.weight
+            chosen = max(lanes, key=lambda lane: current[lane.id])
+            current[chosen.id] -= total
+        others = sorted((lane for lane in lanes if lane.id != chosen.id), key=lambda lane: -lane.weight)
+        return [chosen] + others
+
+
+class LaneMetrics(object):
+    """
+    Class for tracking received counts and send-to-receive latency per lane.
+
+    Metrics are kept in memory, so they only cover receives made by the current process.
+    """
+
+    def __init__(self):
+        self.received = {}
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    def record(self, lane, messages):
+        now = time.time()
+        latencies = [
+            now - int(message["Attributes"]["SentTimestamp"]) / 1000.0
+            for message in messages
+            if "SentTimestamp" in message.get("Attributes", {})
+        ]
+        with self.lock:
+            self.received[lane.id] = self.received.get(lane.id, 0) + len(messages)
+            self.latencies.setdefault(lane.id, deque(maxlen=LATENCY_WINDOW)).extend(latencies)
+
+    def snapshot(self, lane):
+        with self.lock:
+            latencies = list(self.latencies.get(lane.id, ()))
+            received = self.received.get(lane.id, 0)
+        return {
+            "received": received,
+            "latency_seconds_p50": percentile(latencies, 0.5),
+            "latency_seconds_p95": percentile(latencies, 0.95),
+            "latency_seconds_p99": percentile(latencies, 0.99),
+        }
+
+
+def lane_queue_name(queue_name, priority):
+    return "{}-{}".format(queue_name, priority)
+
+
+lane_scheduler = LaneScheduler()
+lane_metrics = LaneMetrics()
+
+
+def clean_lanes(queue_name, lanes, default_priority=None):
+    """
+    Function to validate lane definitions from a request, returning them as {"priority": ..., "weight": ...} dicts.
+
+    Returns None when lanes is not a non-empty list of lanes with distinct valid priorities and weights, or when
+    default_priority is not one of them.
+    """
+    if not isinstance(queue_name, str) or not isinstance(lanes, list) or not lanes:
+        return None
+
+    cleaned = []
+    for lane in lanes:
+        if not isinstance(lane, dict):
+            return None
+        priority = lane.get("priority")
+        weight = lane.get("weight", 1)
+        if not isinstance(priority, str) or not PRIORITY_PATTERN.fullmatch(priority):
+            return None
+        if len(lane_queue_name(queue_name, priority) + DEAD_LETTER_SUFFIX) > MAX_QUEUE_NAME_LENGTH:
+            return None
+        if isinstance(weight, bool) or not str(weight).isdecimal() or not 1 <= int(weight) <= MAX_LANE_WEIGHT:
+            return None
+        cleaned.append({"priority": priority, "weight": int(weight)})
+
+    priorities = [lane["priority"] for lane in cleaned]
+    if len(set(priorities)) != len(priorities):
+        return None
+    if default_priority is not None and default_priority not in priorities:
+        return None
+    return cleaned
+
+
+def get_lanes(queue):
+    return list(queue.lanes.select_related("physical_queue").order_by("-weight", "priority"))
+
+
+def select_lane(queue, priority=None):
+    """
+    Function to return the lane a message with the given priority is sent to, the default lane when none is given.
+    """
+    if priority is None:
+        return queue.lanes.select_related("physical_queue").get(is_default=True)
+    return queue.lanes.select_related("physical_queue").get(priority=priority)
+
+
+def receive_from_lanes(queue, max_messages=10, wait_time_seconds=10, **receive_kwargs):
+    """
+    Function to receive from the lane whose weighted turn it is, falling back to the other lanes when it is empty.
+
+    Returns a receive_message shaped response whose messages carry the QueueId and Priority of their lane.
+    """
+    attribute_names = list(receive_kwargs.pop("AttributeNames", []))
+    if "SentTimestamp" not in attribute_names:
+        attribute_names.append("SentTimestamp")
+
+    lanes = lane_scheduler.order(queue, get_lanes(queue))
+    response = {}
+    messages = []
+    for lane in lanes:
+        response = _receive(lane, max_messages, 0, attribute_names, receive_kwargs)
+        messages = response.get("Messages", [])
+        if messages:
+            break
+
+    # Only long-poll when every lane was empty, on the lane whose turn it is.
+    if lanes and not messages and wait_time_seconds:
+        response = _receive(lanes[0], max_messages, wait_time_seconds, attribute_names, receive_kwargs)
+        messages = response.get("Messages", [])
+
+    result = {"ResponseMetadata": response.get("ResponseMetadata", {"HTTPStatusCode": 200})}
+    if messages:
+        result["Messages"] = messages
+    return result
+
+
+def _receive(lane, max_messages, wait_time_seconds, attribute_names, receive_kwargs):
+    physical_queue = lane.physical_queue
+    response = sqs_router.client_for_queue(physical_queue).receive_message(
+        QueueUrl=physical_queue.queue_url,
+        AttributeNames=attribute_names,
+        MaxNumberOfMessages=max_messages,
+        WaitTimeSeconds=wait_time_seconds,
+        **receive_kwargs
+    )
+    messages = response.get("Messages", [])
+    for message in messages:
+        message["QueueId"] = physical_queue.id
+        message["Priority"] = lane.priority
+    if messages:
+        lane_metrics.record(lane, messages)
+    return response
+
+
+def create_priority_queue(sqs, queue_name, lanes, default_priority=None, region=None, profile=None,
+                          max_receive_count=DEFAULT_MAX_RECEIVE_COUNT):
+    """
+    Function to create a priority queue backed by one physical queue per lane.
+
+    lanes is a list of {"priority": ..., "weight": ...} dicts as returned by clean_lanes; the lightest lane is the
+    default unless one is given. The rows are saved in one transaction, so a failure partway through stores nothing
+    and deletes the SQS queues it already created.
+    """
+    if default_priority is None:
+        default_priority = min(lanes, key=lambda lane: lane["weight"])["priority"]
+
+    created_urls = []
+    try:
+        with transaction.atomic():
+            queue = QueueModel.objects.create(
+                queue_name=queue_name,
+                attributes=dict(STANDARD_QUEUE_ATTRIBUTES),
+                region=region,
+                profile=profile,
+                has_priority_lanes=True,
+            )
+            for lane in lanes:
+                response, physical_queue = create_standard_queue(
+                    sqs, lane_queue_name(queue_name, lane["priority"]),
+                    region=region, profile=profile, max_receive_count=max_receive_count,
+                )
+                created_urls.extend([physical_queue.queue_url, physical_queue.dead_letter_queue.queue_url])
+                QueueLaneModel.objects.create(
+                    priority_queue=queue,
+                    physical_queue=physical_queue,
+                    priority=lane["priority"],
+                    weight=lane["weight"],
+                    is_default=lane["priority"] == default_priority,
+                )
+    except Exception:
+        discard_created_queues(sqs, created_urls)
+        raise
+    return queue
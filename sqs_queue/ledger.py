@@ -0,0 +1,165 @@
+import atexit
+import datetime
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ProcessingLedgerModel
+
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = [0.5, 0.95, 0.99]
+
+
+def sent_timestamp(message):
+    """
+    Function to convert the SentTimestamp attribute of a received SQS message into a datetime.
+    """
+    value = message.get("Attributes", {}).get("SentTimestamp")
+    if value is None:
+        return None
+    return datetime.datetime.fromtimestamp(int(value) / 1000.0, tz=datetime.timezone.utc)
+
+
+class LedgerWriter(object):
+    """
+    Class for buffering ledger records and writing them with bulk inserts on size or time thresholds.
+    """
+
+    def __init__(self, batch_size, flush_seconds):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.flusher = None
+
+    def _ensure_flusher(self):
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self._flush_periodically, name="ledger-flusher", daemon=True)
+                self.flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            close_old_connections()
+            self.flush()
+
+    def record(self, queue_id, message_id, received_at, processed_at=None, status=ProcessingLedgerModel.COMPLETED,
+               sent_at=None):
+        """
+        Function to buffer one completion record, writing the buffer once it reaches the batch size.
+        """
+        self._ensure_flusher()
+        processed_at = processed_at or timezone.now()
+        entry = ProcessingLedgerModel(
+            queue_id=queue_id,
+            message_id=message_id,
+            status=status,
+            sent_at=sent_at,
+            received_at=received_at,
+            processed_at=processed_at,
+            duration_ms=max(0, int((processed_at - received_at).total_seconds() * 1000)),
+        )
+        with self.lock:
+            self.buffer.append(entry)
+            if len(self.buffer) < self.batch_size:
+                return
+            batch, self.buffer = self.buffer, []
+        self._write(batch)
+
+    def flush(self):
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            ProcessingLedgerModel.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            # The ledger is diagnostic, so a failed write is logged instead of failing the consumer.
+            logger.exception("Failed to write %s ledger records.", len(batch))
+
+
+ledger_writer = LedgerWriter(settings.LEDGER_BATCH_SIZE, settings.LEDGER_FLUSH_SECONDS)
+
+
+def parse_time_range(since, until, default_window=datetime.timedelta(hours=1)):
+    """
+    Function to parse the since and until query params into an aware (since, until) pair, or None when invalid.
+
+    until defaults to now and since to default_window before until; values without an offset use the current time
+    zone.
+    """
+    def parse(value):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    until = parse(until) if until else timezone.now()
+    if until is None:
+        return None
+    since = parse(since) if since else until - default_window
+    if since is None or since >= until:
+        return None
+    return since, until
+
+
+def summarize_ledger(queue_id, since, until):
+    """
+    Function to compute throughput and latency percentiles for a queue from the ledger.
+    """
+    query = """
+        SELECT
+            COUNT(*) FILTER (WHERE status = %s),
+            COUNT(*) FILTER (WHERE status = %s),
+            percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY duration_ms)
+                FILTER (WHERE status = %s),
+            percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM processed_at - sent_at) * 1000)
+                FILTER (WHERE status = %s)
+        FROM {table}
+        WHERE queue_id = %s AND processed_at >= %s AND processed_at < %s
+    """.format(table=ProcessingLedgerModel._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, [
+            ProcessingLedgerModel.COMPLETED, ProcessingLedgerModel.FAILED,
+            PERCENTILES, ProcessingLedgerModel.COMPLETED,
+            PERCENTILES, ProcessingLedgerModel.COMPLETED,
+            queue_id, since, until,
+        ])
+        completed, failed, processing_ms, end_to_end_ms = cursor.fetchone()
+
+    window_seconds = (until - since).total_seconds()
+
+    def percentiles(values):
+        values = values or [None] * len(PERCENTILES)
+        return {
+            "p{}".format(int(fraction * 100)): round(value, 2) if value is not None else None
+            for fraction, value in zip(PERCENTILES, values)
+        }
+
+    return {
+        "queue_id": queue_id,
+        "since": since,
+        "until": until,
+        "completed": completed,
+        "failed": failed,
+        "messages_per_second": round(completed / window_seconds, 3) if window_seconds > 0 else None,
+        "processing_ms": percentiles(processing_ms),
+        "end_to_end_ms": percentiles(end_to_end_ms),
+    }
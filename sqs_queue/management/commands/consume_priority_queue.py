@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sqs_queue.clients import sqs_router
+from sqs_queue.lanes import get_lanes, lane_metrics, receive_from_lanes
+from sqs_queue.ledger import ledger_writer, sent_timestamp
+from sqs_queue.models import QueueModel
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for consuming a priority queue with weighted fair polling across its lanes.
+    """
+    help = "Consume a priority queue, polling its lanes in proportion to their weights and deleting handled messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue_id", type=int, help="Id of the priority QueueModel.")
+        parser.add_argument("--max-messages", type=int, default=None, help="Stop after consuming this many messages.")
+        parser.add_argument("--wait-time", type=int, default=10, help="Long-poll seconds when every lane is empty.")
+        parser.add_argument("--report-every", type=int, default=1000, help="Print lane metrics every N messages.")
+
+    def handle(self, *args, **options):
+        try:
+            queue = QueueModel.objects.get(id=options["queue_id"])
+        except QueueModel.DoesNotExist:
+            raise CommandError("Queue {} does not exist.".format(options["queue_id"]))
+
+        if not queue.has_priority_lanes:
+            raise CommandError("Queue {} has no priority lanes.".format(queue.queue_name))
+
+        lanes = {lane.physical_queue.id: lane for lane in get_lanes(queue)}
+        max_messages = options["max_messages"]
+        consumed = 0
+        delete_failed = 0
+        last_reported = 0
+
+        try:
+            while max_messages is None or consumed < max_messages:
+                response = receive_from_lanes(queue, wait_time_seconds=options["wait_time"])
+                received = response.get("Messages", [])
+                if not received:
+                    continue
+
+                received_at = timezone.now()
+                physical_queue = lanes[received[0]["QueueId"]].physical_queue
+                delete_response = sqs_router.client_for_queue(physical_queue).delete_message_batch(
+                    QueueUrl=physical_queue.queue_url,
+                    Entries=[
+                        {"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]}
+                        for index, message in enumerate(received)
+                    ],
+                )
+                # Messages that failed to delete are delivered again, so only deleted ones are recorded as completed.
+                deleted = [received[int(entry["Id"])] for entry in delete_response.get("Successful", [])]
+                for message in deleted:
+                    ledger_writer.record(
+                        queue.id, message["MessageId"], received_at, sent_at=sent_timestamp(message)
+                    )
+
+                consumed += len(deleted)
+                delete_failed += len(received) - len(deleted)
+                if consumed - last_reported >= options["report_every"]:
+                    last_reported = consumed
+                    self._report(lanes.values())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            ledger_writer.flush()
+
+        self._report(lanes.values())
+        if delete_failed:
+            self.stderr.write("{} messages could not be deleted and will be consumed again.".format(delete_failed))
+        self.stdout.write(self.style.SUCCESS("Consumed {} messages.".format(consumed)))
+
+    def _report(self, lanes):
+        # Lane metrics are kept in memory, so these only cover the receives made by this command.
+        for lane in lanes:
+            self.stdout.write(
+                "lane={priority} weight={weight} received={received} "
+                "p50={latency_seconds_p50} p95={latency_seconds_p95} p99={latency_seconds_p99}".format(
+                    priority=lane.priority, weight=lane.weight, **lane_metrics.snapshot(lane)
+                )
+            )
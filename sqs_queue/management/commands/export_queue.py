@@ -0,0 +1,168 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sqs_queue.batching import MAX_BATCH_SIZE, batched
+from sqs_queue.clients import sqs_router
+from sqs_queue.models import QueueModel
+from sqs_queue.segments import DEFAULT_SEGMENT_BYTES, SegmentWriter, encode_message_attributes
+from sqs_queue.sharding import physical_queues
+
+
+# SQS refuses receives once a standard queue has 120,000 messages in flight.
+PEEK_MAX_IN_FLIGHT = 100000
+# Peeking stops this long before the first peeked messages become visible again, so none is exported twice.
+PEEK_VISIBILITY_MARGIN_SECONDS = 10
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for capturing queue traffic into on-disk segment files.
+    """
+    help = "Export messages from a queue into append-only NDJSON segments with an offset index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue_id", type=int, help="Id of the QueueModel to export.")
+        parser.add_argument("directory", help="Directory the segment files are written to.")
+        parser.add_argument(
+            "--mode", choices=("peek", "drain"), default="peek",
+            help="peek leaves messages in the queue, drain deletes them once they are on disk. Peeking still counts "
+                 "as a receive, so repeated peeks can push messages past maxReceiveCount into the dead-letter queue.",
+        )
+        parser.add_argument("--max-messages", type=int, default=None, help="Stop after exporting this many messages.")
+        parser.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES, help="Roll segments at this size.")
+        parser.add_argument(
+            "--visibility-timeout", type=int, default=900,
+            help="Seconds peeked messages stay hidden so each one is exported once. Peeking a queue stops before "
+                 "this runs out, and its messages are released once it is exported.",
+        )
+        parser.add_argument(
+            "--max-in-flight", type=int, default=PEEK_MAX_IN_FLIGHT,
+            help="Peek at most this many messages per queue, as they stay in flight until the queue is exported.",
+        )
+        parser.add_argument("--max-empty-polls", type=int, default=3, help="Stop after this many empty receives.")
+
+    def handle(self, *args, **options):
+        try:
+            queue = QueueModel.objects.get(id=options["queue_id"])
+        except QueueModel.DoesNotExist:
+            raise CommandError("Queue {} does not exist.".format(options["queue_id"]))
+
+        if options["mode"] == "peek" and options["visibility_timeout"] <= PEEK_VISIBILITY_MARGIN_SECONDS:
+            raise CommandError(
+                "--visibility-timeout must be more than {} seconds to peek.".format(PEEK_VISIBILITY_MARGIN_SECONDS)
+            )
+
+        sqs = sqs_router.client_for_queue(queue)
+        delete_failures = 0
+        stopped_early = 0
+
+        with SegmentWriter(options["directory"], segment_bytes=options["segment_bytes"]) as writer:
+            # The shards or lanes of a logical queue are exported one after another into the same segments.
+            for physical_queue in physical_queues(queue):
+                receipt_handles = []
+                try:
+                    failures, complete = self._export(sqs, physical_queue.queue_url, writer, receipt_handles, options)
+                finally:
+                    # Peeked messages are made visible again instead of staying hidden from consumers until the
+                    # timeout, so at most one queue's receipt handles are held at a time.
+                    self._release(sqs, physical_queue.queue_url, receipt_handles)
+                delete_failures += failures
+                stopped_early += not complete
+            exported = writer.records_written
+
+        if delete_failures:
+            self.stderr.write(
+                "{} exported messages could not be deleted and will be exported again.".format(delete_failures)
+            )
+        if stopped_early:
+            self.stderr.write(
+                "Peeking stopped early on {} queues at --max-in-flight or --visibility-timeout, use --mode drain "
+                "for a full export.".format(stopped_early)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            "Exported {} messages from {} to {}.".format(exported, queue.queue_name, options["directory"])
+        ))
+
+    def _export(self, sqs, queue_url, writer, receipt_handles, options):
+        """
+        Function to export one physical queue until it is empty or max_messages is reached.
+
+        Returns the number of failed deletes and whether the queue was fully exported, which a peek is not when it
+        reaches the in-flight limit or the visibility timeout first.
+        """
+        drain = options["mode"] == "drain"
+        max_messages = options["max_messages"]
+        peek_until = time.monotonic() + options["visibility_timeout"] - PEEK_VISIBILITY_MARGIN_SECONDS
+        empty_polls = 0
+        delete_failures = 0
+
+        while empty_polls < options["max_empty_polls"]:
+            remaining = MAX_BATCH_SIZE if max_messages is None else min(
+                MAX_BATCH_SIZE, max_messages - writer.records_written
+            )
+            if remaining <= 0:
+                break
+            if not drain:
+                remaining = min(remaining, options["max_in_flight"] - len(receipt_handles))
+                if remaining <= 0 or time.monotonic() >= peek_until:
+                    return delete_failures, False
+
+            response = sqs.receive_message(
+                QueueUrl=queue_url,
+                AttributeNames=["All"],
+                MessageAttributeNames=["All"],
+                MaxNumberOfMessages=remaining,
+                VisibilityTimeout=options["visibility_timeout"],
+                WaitTimeSeconds=2,
+            )
+            received = response.get("Messages", [])
+            if not received:
+                empty_polls += 1
+                continue
+            empty_polls = 0
+
+            captured_at = time.time()
+            for message in received:
+                writer.append({
+                    "message_id": message["MessageId"],
+                    "body": message["Body"],
+                    "attributes": message.get("Attributes", {}),
+                    "message_attributes": encode_message_attributes(message.get("MessageAttributes", {})),
+                    "captured_at": captured_at,
+                })
+
+            if drain:
+                # Only delete once the batch is durable so a crash never loses messages.
+                writer.flush()
+                delete_failures += self._delete(sqs, queue_url, received)
+            else:
+                receipt_handles.extend(message["ReceiptHandle"] for message in received)
+
+        return delete_failures, True
+
+    def _delete(self, sqs, queue_url, received):
+        """
+        Function to delete an exported batch, retrying failed entries once and returning how many still failed.
+        """
+        entries = [
+            {"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]}
+            for index, message in enumerate(received)
+        ]
+        for _ in range(2):
+            response = sqs.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+            failed_ids = {entry["Id"] for entry in response.get("Failed", [])}
+            entries = [entry for entry in entries if entry["Id"] in failed_ids]
+            if not entries:
+                break
+        return len(entries)
+
+    def _release(self, sqs, queue_url, receipt_handles):
+        for batch in batched(receipt_handles, MAX_BATCH_SIZE):
+            sqs.change_message_visibility_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {"Id": str(index), "ReceiptHandle": receipt_handle, "VisibilityTimeout": 0}
+                    for index, receipt_handle in enumerate(batch)
+                ],
+            )
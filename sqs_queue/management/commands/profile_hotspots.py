@@ -0,0 +1,87 @@
+import glob
+import io
+import json
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sqs_queue.profiling import CPROFILE_MODE, METADATA_SUFFIX, PROFILE_SUFFIXES, SAMPLE_MODE
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for aggregating the hottest functions across collected profiles.
+    """
+    help = "Aggregate cProfile and stack-sample profiles from the profiling directory and print the top hot spots."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help="Profiling directory, defaults to PROFILING_DIR.")
+        parser.add_argument("--limit", type=int, default=20, help="Number of hot spots to print.")
+        parser.add_argument(
+            "--sort", choices=("cumulative", "tottime", "ncalls"), default="cumulative",
+            help="Sort key for cProfile statistics.",
+        )
+        parser.add_argument("--view", default=None, help="Only include profiles of this view name.")
+        parser.add_argument("--queue-id", type=int, default=None, help="Only include profiles of this queue.")
+
+    def _selected(self, profile_path, options):
+        metadata_path = os.path.splitext(profile_path)[0] + METADATA_SUFFIX
+        if options["view"] is None and options["queue_id"] is None:
+            return True
+        if not os.path.exists(metadata_path):
+            return False
+        with open(metadata_path) as metadata_file:
+            metadata = json.load(metadata_file)
+        if options["view"] is not None and metadata.get("view") != options["view"]:
+            return False
+        if options["queue_id"] is not None and metadata.get("queue_id") != options["queue_id"]:
+            return False
+        return True
+
+    def _profiles(self, directory, mode, options):
+        pattern = os.path.join(directory, "*" + PROFILE_SUFFIXES[mode])
+        return [path for path in sorted(glob.glob(pattern)) if self._selected(path, options)]
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or settings.PROFILING_DIR
+        if not os.path.isdir(directory):
+            raise CommandError("Profiling directory {} does not exist.".format(directory))
+
+        cprofile_paths = self._profiles(directory, CPROFILE_MODE, options)
+        sample_paths = self._profiles(directory, SAMPLE_MODE, options)
+        if not cprofile_paths and not sample_paths:
+            raise CommandError("No profiles found in {}.".format(directory))
+
+        if cprofile_paths:
+            output = io.StringIO()
+            stats = pstats.Stats(*cprofile_paths, stream=output)
+            stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
+            self.stdout.write("cProfile hot spots across {} profiles:".format(len(cprofile_paths)))
+            self.stdout.write(output.getvalue())
+
+        if sample_paths:
+            self_samples = Counter()
+            total_samples = Counter()
+            sample_count = 0
+            for path in sample_paths:
+                with open(path) as collapsed_file:
+                    for line in collapsed_file:
+                        stack, _, count = line.rstrip("\n").rpartition(" ")
+                        frames = stack.split(";")
+                        count = int(count)
+                        sample_count += count
+                        self_samples[frames[-1]] += count
+                        for frame in set(frames):
+                            total_samples[frame] += count
+
+            self.stdout.write("Stack-sample hot spots across {} profiles ({} samples):".format(
+                len(sample_paths), sample_count
+            ))
+            self.stdout.write("{:>8} {:>8}  function".format("self%", "total%"))
+            for frame, count in self_samples.most_common(options["limit"]):
+                self.stdout.write("{:>8.2f} {:>8.2f}  {}".format(
+                    100.0 * count / sample_count, 100.0 * total_samples[frame] / sample_count, frame
+                ))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sqs_queue.clients import SQSClientRouter
+from sqs_queue.models import QueueModel
+from sqs_queue.sharding import redrive_queue
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for moving messages from a queue's dead-letter queue back to the queue.
+    """
+    help = "Redrive messages from the dead-letter queue of the given queue using parallel batch pipelines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue_id", type=int, help="Id of the source QueueModel.")
+        parser.add_argument("--workers", type=int, default=16, help="Number of parallel pipelines.")
+        parser.add_argument("--rate-limit", type=float, default=None, help="Maximum messages moved per second.")
+        parser.add_argument("--max-messages", type=int, default=None, help="Stop after moving this many messages.")
+        parser.add_argument("--report-every", type=int, default=1000, help="Print progress every N messages.")
+
+    def handle(self, *args, **options):
+        try:
+            queue = QueueModel.objects.get(id=options["queue_id"])
+        except QueueModel.DoesNotExist:
+            raise CommandError("Queue {} does not exist.".format(options["queue_id"]))
+
+        sqs = SQSClientRouter(max_pool_connections=options["workers"] * 2).client_for_queue(queue)
+
+        report_every = options["report_every"]
+        last_reported = [0]
+
+        def on_progress(snapshot):
+            if snapshot["moved"] - last_reported[0] >= report_every:
+                last_reported[0] = snapshot["moved"]
+                self.stdout.write(
+                    "moved={moved} failed={failed} rate={messages_per_second}/s".format(**snapshot)
+                )
+
+        result = redrive_queue(
+            sqs,
+            queue,
+            workers=options["workers"],
+            max_messages=options["max_messages"],
+            rate_limit=options["rate_limit"],
+            on_progress=on_progress,
+        )
+        if result is None:
+            raise CommandError("Queue {} has no dead-letter queue.".format(queue.queue_name))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Redrive completed: moved={moved} failed={failed} in {elapsed_seconds}s "
+            "({messages_per_second}/s)".format(**result)
+        ))
@@ -0,0 +1,66 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sqs_queue.batching import batched, send_message_batches
+from sqs_queue.clients import SQSClientRouter
+from sqs_queue.models import QueueModel
+from sqs_queue.segments import SegmentReader, decode_message_attributes
+from sqs_queue.sharding import send_targets
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for replaying captured segment files into a queue at a target rate.
+    """
+    help = "Replay messages captured by export_queue into a queue using batched sends."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue_id", type=int, help="Id of the QueueModel to replay into.")
+        parser.add_argument("directory", help="Directory holding the captured segment files.")
+        parser.add_argument("--rate", type=float, default=None, help="Target messages per second.")
+        parser.add_argument("--workers", type=int, default=8, help="Number of parallel senders.")
+        parser.add_argument("--endpoint-url", default=None, help="SQS endpoint, e.g. a local SQS stand-in.")
+        parser.add_argument("--queue-url", default=None, help="Override the queue url of the QueueModel.")
+        parser.add_argument("--report-every", type=int, default=10000, help="Print progress every N messages.")
+
+    def handle(self, *args, **options):
+        try:
+            queue = QueueModel.objects.get(id=options["queue_id"])
+        except QueueModel.DoesNotExist:
+            raise CommandError("Queue {} does not exist.".format(options["queue_id"]))
+
+        if not os.path.isdir(options["directory"]):
+            raise CommandError("Directory {} does not exist.".format(options["directory"]))
+
+        sqs = SQSClientRouter(max_pool_connections=options["workers"] * 2).client_for_queue(
+            queue, endpoint_url=options["endpoint_url"]
+        )
+        queue_url = options["queue_url"] or [target.queue_url for target in send_targets(queue)]
+
+        def to_entries(records):
+            for index, record in enumerate(records):
+                entry = {"Id": str(index), "MessageBody": record["body"]}
+                if record.get("message_attributes"):
+                    entry["MessageAttributes"] = decode_message_attributes(record["message_attributes"])
+                yield entry
+
+        report_every = options["report_every"]
+        last_reported = [0]
+
+        def on_progress(snapshot):
+            if snapshot["sent"] - last_reported[0] >= report_every:
+                last_reported[0] = snapshot["sent"]
+                self.stdout.write("sent={sent} failed={failed} rate={messages_per_second}/s".format(**snapshot))
+
+        batches = (list(to_entries(records)) for records in batched(SegmentReader(options["directory"])))
+        result = send_message_batches(
+            sqs, queue_url, batches,
+            workers=options["workers"],
+            rate_limit=options["rate"],
+            on_progress=on_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Replay completed: sent={sent} failed={failed} in {elapsed_seconds}s "
+            "({messages_per_second}/s)".format(**result)
+        ))
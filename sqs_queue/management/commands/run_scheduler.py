@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sqs_queue.scheduler import MessageScheduler
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for releasing scheduled messages to SQS when they become due.
+    """
+    help = "Run the scheduler that sends stored long-delay messages through batched send_message_batch calls."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tick", type=float, default=None, help="Width of a timing wheel slot in seconds.")
+        parser.add_argument("--horizon", type=float, default=None, help="Seconds ahead loaded into memory.")
+        parser.add_argument("--refresh", type=float, default=None, help="Seconds between loads of new messages.")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows fetched per database query.")
+        parser.add_argument("--report-every", type=float, default=60, help="Print totals every N seconds.")
+
+    def handle(self, *args, **options):
+        scheduler = MessageScheduler(
+            tick_seconds=options["tick"],
+            horizon_seconds=options["horizon"],
+            refresh_seconds=options["refresh"],
+            chunk_size=options["chunk_size"],
+        )
+        report_every = options["report_every"]
+        last_reported = [time.monotonic()]
+
+        def on_cycle(scheduler):
+            if time.monotonic() - last_reported[0] >= report_every:
+                last_reported[0] = time.monotonic()
+                self.stdout.write(self._format(scheduler))
+
+        try:
+            scheduler.run(on_cycle=on_cycle)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Scheduler stopped: " + self._format(scheduler)))
+
+    def _format(self, scheduler):
+        return "loaded={loaded} sent={sent} failed={failed} in_wheel={in_wheel}".format(
+            in_wheel=len(scheduler.wheel), **scheduler.totals
+        )
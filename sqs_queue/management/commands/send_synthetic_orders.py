@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sqs_queue.batching import send_message_batches
+from sqs_queue.clients import SQSClientRouter
+from sqs_queue.models import QueueLaneModel, QueueModel
+from sqs_queue.sharding import send_targets
+from sqs_queue.synthetic import iter_order_batches
+
+
+class Command(BaseCommand):
+    """
+    Class to create command for injecting synthetic orders into a queue for load tests.
+    """
+    help = "Generate synthetic orders with vectorized random generation and send them in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue_id", type=int, help="Id of the QueueModel to send to.")
+        parser.add_argument("--count", type=int, default=100000, help="Number of synthetic orders to send.")
+        parser.add_argument("--workers", type=int, default=16, help="Number of parallel senders.")
+        parser.add_argument("--rate", type=float, default=None, help="Target messages per second.")
+        parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible order data.")
+        parser.add_argument("--sequence-id", default=None, help="sequence_id stamped on every order.")
+        parser.add_argument("--priority", default=None, help="Lane to send to when the queue has priority lanes.")
+        parser.add_argument("--endpoint-url", default=None, help="SQS endpoint, e.g. a local SQS stand-in.")
+
+    def handle(self, *args, **options):
+        try:
+            queue = QueueModel.objects.get(id=options["queue_id"])
+        except QueueModel.DoesNotExist:
+            raise CommandError("Queue {} does not exist.".format(options["queue_id"]))
+
+        try:
+            targets = send_targets(queue, options["priority"])
+        except QueueLaneModel.DoesNotExist:
+            raise CommandError("Queue {} has no {} lane.".format(queue.queue_name, options["priority"]))
+
+        sqs = SQSClientRouter(max_pool_connections=options["workers"] * 2).client_for_queue(
+            queue, endpoint_url=options["endpoint_url"]
+        )
+
+        result = send_message_batches(
+            sqs,
+            [target.queue_url for target in targets],
+            iter_order_batches(options["count"], sequence_id=options["sequence_id"], seed=options["seed"]),
+            workers=options["workers"],
+            rate_limit=options["rate"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Sent {sent} synthetic orders ({failed} failed) in {elapsed_seconds}s "
+            "({messages_per_second}/s)".format(**result)
+        ))
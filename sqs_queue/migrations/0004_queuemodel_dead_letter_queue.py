@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 22:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sqs_queue', '0003_queuemodel_queue_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuemodel',
+            name='dead_letter_queue',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='source_queues', to='sqs_queue.queuemodel'),
+        ),
+    ]
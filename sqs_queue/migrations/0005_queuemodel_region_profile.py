@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-18 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sqs_queue', '0004_queuemodel_dead_letter_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuemodel',
+            name='profile',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='queuemodel',
+            name='region',
+            field=models.CharField(blank=True, max_length=30, null=True),
+        ),
+    ]
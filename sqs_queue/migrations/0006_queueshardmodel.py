@@ -0,0 +1,34 @@
+# Generated by Django 4.2.3 on 2026-10-18 22:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sqs_queue', '0005_queuemodel_region_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuemodel',
+            name='shard_routing',
+            field=models.CharField(blank=True, choices=[('HASH', 'Consistent hash'), ('ROUND_ROBIN', 'Round robin')], max_length=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='QueueShardModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard_index', models.PositiveIntegerField()),
+                ('state', models.CharField(choices=[('ACTIVE', 'Active'), ('DRAINING', 'Draining')], default='ACTIVE', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('logical_queue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='sqs_queue.queuemodel')),
+                ('physical_queue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='shard', to='sqs_queue.queuemodel')),
+            ],
+            options={
+                'unique_together': {('logical_queue', 'shard_index')},
+            },
+        ),
+    ]
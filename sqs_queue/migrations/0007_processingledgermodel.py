@@ -0,0 +1,30 @@
+# Generated by Django 4.2.3 on 2026-10-18 22:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sqs_queue', '0006_queueshardmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingLedgerModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='COMPLETED', max_length=10)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('received_at', models.DateTimeField()),
+                ('processed_at', models.DateTimeField()),
+                ('duration_ms', models.PositiveIntegerField()),
+                ('queue', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='sqs_queue.queuemodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['queue', 'processed_at'], name='ledger_queue_processed_idx'), models.Index(fields=['processed_at'], name='ledger_processed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.3 on 2026-10-18 22:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sqs_queue', '0007_processingledgermodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuemodel',
+            name='has_priority_lanes',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='QueueLaneModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.CharField(max_length=30)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('is_default', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('physical_queue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lane', to='sqs_queue.queuemodel')),
+                ('priority_queue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lanes', to='sqs_queue.queuemodel')),
+            ],
+            options={
+                'unique_together': {('priority_queue', 'priority')},
+            },
+        ),
+    ]
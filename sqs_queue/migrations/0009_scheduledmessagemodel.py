@@ -0,0 +1,31 @@
+# Generated by Django 4.2.3 on 2026-10-18 22:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sqs_queue', '0008_queuelanemodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledMessageModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_body', models.TextField()),
+                ('routing_key', models.CharField(blank=True, max_length=100, null=True)),
+                ('priority', models.CharField(blank=True, max_length=30, null=True)),
+                ('due_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('message_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('queue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_messages', to='sqs_queue.queuemodel')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['due_at'], name='scheduled_due_idx'), models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['created_at'], name='scheduled_created_idx')],
+            },
+        ),
+    ]
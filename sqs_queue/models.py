@@ -5,8 +5,108 @@ class QueueModel(models.Model):
     """
     Class to create model for storing queue details.
     """
+    HASH_ROUTING = "HASH"
+    ROUND_ROBIN_ROUTING = "ROUND_ROBIN"
+    SHARD_ROUTING_CHOICES = (
+        (HASH_ROUTING, "Consistent hash"),
+        (ROUND_ROBIN_ROUTING, "Round robin"),
+    )
+
     queue_name = models.CharField(max_length=80, null=False, blank=False)
     attributes = models.JSONField()
     queue_url = models.CharField(max_length=200, null=True, blank=False)
+    region = models.CharField(max_length=30, null=True, blank=True)
+    profile = models.CharField(max_length=64, null=True, blank=True)
+    dead_letter_queue = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="source_queues"
+    )
+    shard_routing = models.CharField(max_length=12, choices=SHARD_ROUTING_CHOICES, null=True, blank=True)
+    has_priority_lanes = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class QueueShardModel(models.Model):
+    """
+    Class to create model for storing the physical queues backing a sharded logical queue.
+    """
+    ACTIVE = "ACTIVE"
+    DRAINING = "DRAINING"
+    STATE_CHOICES = (
+        (ACTIVE, "Active"),
+        (DRAINING, "Draining"),
+    )
+
+    logical_queue = models.ForeignKey(QueueModel, on_delete=models.CASCADE, related_name="shards")
+    physical_queue = models.OneToOneField(QueueModel, on_delete=models.CASCADE, related_name="shard")
+    shard_index = models.PositiveIntegerField()
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=ACTIVE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("logical_queue", "shard_index")
+
+
+class QueueLaneModel(models.Model):
+    """
+    Class to create model for storing the weighted priority lanes of a priority queue.
+    """
+    priority_queue = models.ForeignKey(QueueModel, on_delete=models.CASCADE, related_name="lanes")
+    physical_queue = models.OneToOneField(QueueModel, on_delete=models.CASCADE, related_name="lane")
+    priority = models.CharField(max_length=30)
+    weight = models.PositiveIntegerField(default=1)
+    is_default = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("priority_queue", "priority")
+
+
+class ProcessingLedgerModel(models.Model):
+    """
+    Class to create model for storing a record of every message consumers finished processing.
+    """
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    STATUS_CHOICES = (
+        (COMPLETED, "Completed"),
+        (FAILED, "Failed"),
+    )
+
+    queue = models.ForeignKey(
+        QueueModel, null=True, blank=True, on_delete=models.SET_NULL, related_name="ledger_entries"
+    )
+    message_id = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=COMPLETED)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField()
+    processed_at = models.DateTimeField()
+    duration_ms = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["queue", "processed_at"], name="ledger_queue_processed_idx"),
+            models.Index(fields=["processed_at"], name="ledger_processed_idx"),
+        ]
+
+
+class ScheduledMessageModel(models.Model):
+    """
+    Class to create model for storing messages scheduled further ahead than SQS DelaySeconds allows.
+    """
+    queue = models.ForeignKey(QueueModel, on_delete=models.CASCADE, related_name="scheduled_messages")
+    message_body = models.TextField()
+    routing_key = models.CharField(max_length=100, null=True, blank=True)
+    priority = models.CharField(max_length=30, null=True, blank=True)
+    due_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+    message_id = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["due_at"], name="scheduled_due_idx", condition=models.Q(sent_at__isnull=True)),
+            models.Index(fields=["created_at"], name="scheduled_created_idx", condition=models.Q(sent_at__isnull=True)),
+        ]
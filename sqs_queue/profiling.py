@@ -0,0 +1,145 @@
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+CPROFILE_MODE = "cprofile"
+SAMPLE_MODE = "sample"
+PROFILE_MODES = (CPROFILE_MODE, SAMPLE_MODE)
+PROFILE_SUFFIXES = {CPROFILE_MODE: ".prof", SAMPLE_MODE: ".collapsed"}
+METADATA_SUFFIX = ".json"
+
+
+class StackSampler(object):
+    """
+    Class for sampling the stack of one thread at a fixed interval and counting collapsed stacks.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append("{}:{}:{}".format(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def dump(self, path):
+        with open(path, "w") as collapsed_file:
+            for stack, count in self.stacks.most_common():
+                collapsed_file.write("{} {}\n".format(stack, count))
+
+
+@contextmanager
+def profile_block(name, metadata=None, mode=None):
+    """
+    Function to profile the wrapped block and write the profile with its metadata to PROFILING_DIR.
+    """
+    mode = mode if mode in PROFILE_MODES else settings.PROFILING_MODE
+    if mode == SAMPLE_MODE:
+        profiler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    started_at = time.time()
+    started = time.perf_counter()
+    metadata = dict(metadata or {})
+    try:
+        yield metadata
+    finally:
+        if mode == SAMPLE_MODE:
+            profiler.stop()
+        else:
+            profiler.disable()
+
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        base_name = os.path.join(
+            settings.PROFILING_DIR,
+            "{}-{}-{}".format(time.strftime("%Y%m%dT%H%M%S", time.gmtime(started_at)), name, uuid.uuid4().hex[:8]),
+        )
+        if mode == SAMPLE_MODE:
+            profiler.dump(base_name + PROFILE_SUFFIXES[SAMPLE_MODE])
+        else:
+            profiler.dump_stats(base_name + PROFILE_SUFFIXES[CPROFILE_MODE])
+
+        metadata.update({
+            "name": name,
+            "mode": mode,
+            "started_at": started_at,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "pid": os.getpid(),
+        })
+        with open(base_name + METADATA_SUFFIX, "w") as metadata_file:
+            json.dump(metadata, metadata_file, default=str)
+
+
+@contextmanager
+def maybe_profile(name, sample_rate, metadata=None):
+    """
+    Function to profile the wrapped block for a sample_rate fraction of calls, doing nothing otherwise.
+    """
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield None
+        return
+    with profile_block(name, metadata) as profile_metadata:
+        yield profile_metadata
+
+
+class ProfilingMiddleware(object):
+    """
+    Class for profiling requests that send the X-Profile header or are picked by PROFILING_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _requested_mode(self, request):
+        if settings.PROFILING_HEADER_ENABLED:
+            header = request.headers.get("X-Profile")
+            if header:
+                return header.lower() if header.lower() in PROFILE_MODES else settings.PROFILING_MODE
+        sample_rate = settings.PROFILING_SAMPLE_RATE
+        if sample_rate > 0 and random.random() < sample_rate:
+            return settings.PROFILING_MODE
+        return None
+
+    def __call__(self, request):
+        mode = self._requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        with profile_block("request", {"method": request.method, "path": request.path}, mode) as metadata:
+            response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None:
+                metadata["view"] = match.view_name
+                metadata["queue_id"] = match.kwargs.get("pk")
+            metadata["status_code"] = response.status_code
+        return response
@@ -0,0 +1,107 @@
+import logging
+
+from django.db import transaction
+
+from .dead_letter import DEFAULT_MAX_RECEIVE_COUNT, build_redrive_policy, create_dead_letter_queue
+from .models import QueueModel
+from .resilience import no_deadline
+from .serializers import QueueSerializer
+
+
+logger = logging.getLogger(__name__)
+
+
+STANDARD_QUEUE_ATTRIBUTES = {
+    "DelaySeconds": "0",          # 0-900 sec Default = 0
+    "MaximumMessageSize": "262144",      # 1024-262144 Default = 262144(256 KiB)
+    "MessageRetentionPeriod": "345600",         # 60-1,209,600 sec Default = 345600(4 days)
+    "ReceiveMessageWaitTimeSeconds": "20",         # 0-20 sec Default 0
+    "VisibilityTimeout": "43200",                  # 0-43200 sec Default 30 sec
+}
+
+
+def _save_queue(data):
+    serializer = QueueSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+def create_standard_queue(sqs, queue_name, region=None, profile=None, max_receive_count=DEFAULT_MAX_RECEIVE_COUNT):
+    """
+    Function to create an SQS queue with its dead-letter queue and store both, returning the response and queue.
+
+    Nothing is stored unless the source queue is created, and a dead-letter queue created for a source queue that
+    then fails to be created is deleted again, so failed attempts leave no orphaned rows or queues.
+    """
+    dead_letter_name, dead_letter_url, dead_letter_attributes, dead_letter_arn = create_dead_letter_queue(
+        sqs, queue_name
+    )
+
+    attributes = dict(STANDARD_QUEUE_ATTRIBUTES)
+    attributes["RedrivePolicy"] = build_redrive_policy(dead_letter_arn, max_receive_count)
+
+    try:
+        response = sqs.create_queue(
+            QueueName=queue_name,
+            Attributes=attributes
+        )
+    except Exception:
+        discard_created_queues(sqs, [dead_letter_url])
+        raise
+    if response.get("ResponseMetadata").get("HTTPStatusCode", None) != 200:
+        discard_created_queues(sqs, [dead_letter_url])
+        return response, None
+
+    with transaction.atomic():
+        # create_queue is idempotent, so a repeated create reuses the stored dead-letter queue.
+        dead_letter_queue = QueueModel.objects.filter(queue_url=dead_letter_url).first() or _save_queue({
+            "queue_name": dead_letter_name,
+            "attributes": dead_letter_attributes,
+            "queue_url": dead_letter_url,
+            "region": region,
+            "profile": profile,
+        })
+        queue = _save_queue({
+            "queue_name": queue_name,
+            "attributes": attributes,
+            "queue_url": response.get("QueueUrl", None),
+            "dead_letter_queue": dead_letter_queue.id,
+            "region": region,
+            "profile": profile,
+        })
+    return response, queue
+
+
+def discard_created_queues(sqs, queue_urls):
+    """
+    Function to delete SQS queues created by a multi-queue create that failed and rolled back its rows.
+
+    Urls still stored on a row belonged to queues that existed before the create and are kept.
+    """
+    with no_deadline():
+        for queue_url in queue_urls:
+            if QueueModel.objects.filter(queue_url=queue_url).exists():
+                continue
+            try:
+                sqs.delete_queue(QueueUrl=queue_url)
+            except Exception:
+                logger.exception("Failed to delete %s after a failed create.", queue_url)
+
+
+def delete_standard_queue(sqs, queue):
+    """
+    Function to delete an SQS queue and, once no other queue uses it, its dead-letter queue, removing their rows.
+    """
+    response = sqs.delete_queue(QueueUrl=queue.queue_url)
+    if response.get("ResponseMetadata").get("HTTPStatusCode", None) != 200:
+        return response
+
+    dead_letter_queue = queue.dead_letter_queue
+    queue.delete()
+    if dead_letter_queue is not None and not dead_letter_queue.source_queues.exists():
+        try:
+            sqs.delete_queue(QueueUrl=dead_letter_queue.queue_url)
+        except sqs.exceptions.QueueDoesNotExist:
+            pass
+        dead_letter_queue.delete()
+    return response
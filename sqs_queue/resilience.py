@@ -0,0 +1,306 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from botocore.retries import standard
+from django.conf import settings
+
+
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "RequestThrottled",
+    "AWS.SimpleQueueService.RequestThrottled",
+}
+
+RETRY_HANDLER_ID = "retry-config-sqs"
+# Receives without WaitTimeSeconds use the queue's ReceiveMessageWaitTimeSeconds, which is at most this.
+MAX_WAIT_SECONDS = 20
+
+_local = threading.local()
+
+
+class CircuitOpenError(Exception):
+    """
+    Exception raised when an SQS call is refused because its circuit breaker is open.
+    """
+
+
+class DeadlineExceeded(Exception):
+    """
+    Exception raised when the request deadline leaves no time for another SQS call.
+    """
+
+
+class CircuitBreaker(object):
+    """
+    Class for failing fast on an SQS queue/operation after repeated errors or slow responses.
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold, latency_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Function to raise CircuitOpenError unless the call may proceed, letting one trial call through after the reset timeout.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+            raise CircuitOpenError()
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Function to give back a half-open trial for a call that was abandoned before SQS answered.
+        """
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_latency(self, seconds):
+        if seconds > self.latency_threshold:
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+class CircuitBreakerRegistry(object):
+    """
+    Class for keeping one circuit breaker per queue and operation.
+    """
+
+    def __init__(self):
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, queue_key, operation):
+        key = (queue_key, operation)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(key, CircuitBreaker(
+                    settings.SQS_BREAKER_FAILURE_THRESHOLD,
+                    settings.SQS_BREAKER_LATENCY_SECONDS,
+                    settings.SQS_BREAKER_RESET_SECONDS,
+                ))
+        return breaker
+
+
+breakers = CircuitBreakerRegistry()
+
+
+class Deadline(object):
+    """
+    Class for tracking the time left to spend on SQS calls in the current request.
+    """
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+
+def current_deadline():
+    return getattr(_local, "deadline", None)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """
+    Function to apply a deadline to every SQS call made by the current thread inside the block.
+    """
+    previous = current_deadline()
+    deadline = Deadline(seconds)
+    if previous is not None and previous.expires_at < deadline.expires_at:
+        deadline = previous
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
+
+@contextmanager
+def no_deadline():
+    """
+    Function to lift the deadline inside the block, for cleanup that has to run even after the deadline passed.
+    """
+    previous = current_deadline()
+    _local.deadline = None
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def bind_deadline(function):
+    """
+    Function to wrap function so it runs under the calling thread's deadline, e.g. when submitted to an executor.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return function
+
+    def bound(*args, **kwargs):
+        previous = current_deadline()
+        _local.deadline = deadline
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _local.deadline = previous
+    return bound
+
+
+def attempt_seconds(wait_seconds=0):
+    """
+    Function to return the longest one attempt of an SQS call may take, for a long-poll of wait_seconds.
+
+    Clients use a read timeout of SQS_SHORT_READ_TIMEOUT plus the long-poll wait, so this also bounds a hung connection.
+    """
+    return settings.SQS_CONNECT_TIMEOUT + settings.SQS_SHORT_READ_TIMEOUT + wait_seconds
+
+
+def deadline_allows(seconds, deadline=None):
+    """
+    Function to check whether the deadline, by default the current thread's, leaves seconds for SQS calls.
+    """
+    deadline = deadline or current_deadline()
+    return deadline is None or deadline.remaining() - settings.SQS_DEADLINE_MARGIN_SECONDS >= seconds
+
+
+def fit_wait_seconds(wait_seconds, deadline=None):
+    """
+    Function to shorten a long-poll wait so the call fits in the deadline, raising DeadlineExceeded if nothing fits.
+    """
+    deadline = deadline or current_deadline()
+    if deadline is None:
+        return wait_seconds
+    budget = deadline.remaining() - settings.SQS_DEADLINE_MARGIN_SECONDS - attempt_seconds()
+    if budget < 0:
+        raise DeadlineExceeded()
+    return min(wait_seconds, int(budget))
+
+
+def _before_parameter_build(params, model, context, **kwargs):
+    wait_seconds = params.get("WaitTimeSeconds", MAX_WAIT_SECONDS if model.name == "ReceiveMessage" else 0)
+    deadline = current_deadline()
+    fitted_seconds = fit_wait_seconds(wait_seconds, deadline)
+    if fitted_seconds != wait_seconds:
+        wait_seconds = fitted_seconds
+        params["WaitTimeSeconds"] = wait_seconds
+
+    context["deadline"] = deadline
+    context["breaker_key"] = (params.get("QueueUrl") or params.get("QueueName"), model.name)
+    context["wait_seconds"] = wait_seconds
+
+
+def _before_call(model, context, **kwargs):
+    # The breaker is claimed only once parameters are validated, right before sending, so a half-open trial is always
+    # released by after-call or after-call-error.
+    breaker = breakers.get(*context["breaker_key"])
+    breaker.before_call()
+
+    context["circuit_breaker"] = breaker
+    context["call_started_at"] = time.monotonic()
+
+
+def _needs_retry(retry_handler, request_dict, **kwargs):
+    # The first attempt was checked in before-parameter-build; a retry is only made when its backoff delay and worst
+    # case attempt still fit, otherwise the error of the last attempt is raised.
+    delay = retry_handler.needs_retry(request_dict=request_dict, **kwargs)
+    context = request_dict["context"]
+    deadline = context.get("deadline")
+    if delay is not None and deadline is not None:
+        if not deadline_allows(delay + attempt_seconds(context["wait_seconds"]), deadline):
+            return None
+    return delay
+
+
+def _after_call(http_response, parsed, context, **kwargs):
+    breaker = context.get("circuit_breaker")
+    if breaker is None:
+        return
+    error_code = parsed.get("Error", {}).get("Code")
+    if http_response.status_code >= 500 or error_code in THROTTLING_ERROR_CODES:
+        breaker.record_failure()
+        return
+    # Long-poll wait time is expected, only the time on top of it counts as latency.
+    elapsed = time.monotonic() - context["call_started_at"] - context["wait_seconds"]
+    breaker.record_latency(elapsed)
+
+
+def _after_call_error(exception, context, **kwargs):
+    breaker = context.get("circuit_breaker")
+    if breaker is None:
+        return
+    if isinstance(exception, DeadlineExceeded):
+        breaker.release()
+    else:
+        breaker.record_failure()
+
+
+def install_guards(client):
+    """
+    Function to attach circuit breakers and deadline enforcement to every call made through an SQS client.
+    """
+    events = client.meta.events
+    events.register("before-parameter-build.sqs", _before_parameter_build)
+    events.register_last("before-call.sqs", _before_call)
+
+    retries = client.meta.config.retries
+    if retries.get("mode") == "standard":
+        # Swap the client's standard retry handler for one that only retries within the deadline.
+        events.unregister("needs-retry.sqs", unique_id=RETRY_HANDLER_ID)
+        retry_handler = standard.register_retry_handler(client, max_attempts=retries["total_max_attempts"])
+        events.unregister("needs-retry.sqs", unique_id=RETRY_HANDLER_ID)
+        events.register("needs-retry.sqs", partial(_needs_retry, retry_handler), unique_id=RETRY_HANDLER_ID)
+    events.register("after-call.sqs", _after_call)
+    events.register("after-call-error.sqs", _after_call_error)
+    return client
+
+
+class DeadlineMiddleware(object):
+    """
+    Class for capping the time a request spends in SQS calls, optionally lowered by the X-Request-Deadline-Ms header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        seconds = settings.SQS_REQUEST_DEADLINE_SECONDS
+        header = request.headers.get("X-Request-Deadline-Ms")
+        if header and header.isdigit():
+            seconds = min(seconds, int(header) / 1000.0)
+        with deadline_scope(seconds):
+            return self.get_response(request)
@@ -0,0 +1,223 @@
+import datetime
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .batching import MAX_BATCH_SIZE, batched
+from .clients import sqs_router
+from .models import ScheduledMessageModel
+from .resilience import CircuitOpenError
+from .sharding import route_send_queue
+
+
+logger = logging.getLogger(__name__)
+
+MAX_DELAY_SECONDS = 900
+# Rows created by API servers whose clocks run behind the scheduler's are still picked up.
+CLOCK_SKEW_SECONDS = 60
+
+
+class TimingWheel(object):
+    """
+    Class for scheduling items into fixed-width time slots with constant-time insertion and release.
+
+    Items due further ahead than the wheel spans wait in an overflow heap until they come within range.
+    """
+
+    def __init__(self, tick_seconds, slot_count, start):
+        self.tick_seconds = tick_seconds
+        self.slots = [[] for _ in range(slot_count)]
+        self.current_tick = int(start // tick_seconds)
+        self.overflow = []
+        self.sequence = itertools.count()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, item, due):
+        """
+        Function to schedule an item for the epoch timestamp due, overdue items go into the next slot released.
+        """
+        tick = max(int(due // self.tick_seconds), self.current_tick)
+        if tick - self.current_tick < len(self.slots):
+            self.slots[tick % len(self.slots)].append(item)
+        else:
+            heapq.heappush(self.overflow, (tick, next(self.sequence), item))
+        self.size += 1
+
+    def advance(self, now):
+        """
+        Function to move the wheel up to the epoch timestamp now and return every item that became due.
+        """
+        due = []
+        target_tick = int(now // self.tick_seconds)
+        while self.current_tick <= target_tick:
+            slot = self.slots[self.current_tick % len(self.slots)]
+            due.extend(slot)
+            slot.clear()
+            self.current_tick += 1
+            while self.overflow and self.overflow[0][0] - self.current_tick < len(self.slots):
+                tick, _, item = heapq.heappop(self.overflow)
+                self.slots[max(tick, self.current_tick) % len(self.slots)].append(item)
+        self.size -= len(due)
+        return due
+
+
+def schedule_message(queue, message_body, due_at, routing_key=None, priority=None):
+    """
+    Function to store a message that the scheduler sends to the queue once due_at is reached.
+    """
+    return ScheduledMessageModel.objects.create(
+        queue=queue, message_body=message_body, due_at=due_at, routing_key=routing_key, priority=priority
+    )
+
+
+class MessageScheduler(object):
+    """
+    Class for releasing stored scheduled messages to SQS when they become due.
+
+    Only messages due within the horizon are held in memory, as ids in a timing wheel. The first load also picks up
+    every overdue message, so nothing is lost across restarts. Delivery is at least once: a crash or database error
+    between sending a batch and marking it sent resends that batch.
+    """
+
+    def __init__(self, tick_seconds=None, horizon_seconds=None, refresh_seconds=None, retry_seconds=None,
+                 chunk_size=None):
+        self.tick_seconds = tick_seconds or settings.SCHEDULER_TICK_SECONDS
+        self.horizon_seconds = horizon_seconds or settings.SCHEDULER_HORIZON_SECONDS
+        self.refresh_seconds = refresh_seconds or settings.SCHEDULER_REFRESH_SECONDS
+        self.retry_seconds = retry_seconds or settings.SCHEDULER_RETRY_SECONDS
+        self.chunk_size = chunk_size or settings.SCHEDULER_CHUNK_SIZE
+        self.wheel = TimingWheel(
+            self.tick_seconds, int(self.horizon_seconds // self.tick_seconds) + 1, time.time()
+        )
+        self.pending = set()
+        self.loaded_until = None
+        self.created_since = None
+        self.totals = {"loaded": 0, "sent": 0, "failed": 0}
+
+    def load(self, now):
+        """
+        Function to add messages due before now plus the horizon, and messages created since the last load, to the wheel.
+        """
+        until = now + datetime.timedelta(seconds=self.horizon_seconds)
+        scheduled = ScheduledMessageModel.objects.filter(sent_at__isnull=True, due_at__lt=until)
+        if self.loaded_until is not None:
+            scheduled = scheduled.filter(Q(due_at__gte=self.loaded_until) | Q(created_at__gte=self.created_since))
+
+        loaded = 0
+        for scheduled_id, due_at in scheduled.values_list("id", "due_at").iterator(chunk_size=self.chunk_size):
+            if scheduled_id in self.pending:
+                continue
+            self.pending.add(scheduled_id)
+            self.wheel.add(scheduled_id, due_at.timestamp())
+            loaded += 1
+
+        self.loaded_until = until
+        self.created_since = now - datetime.timedelta(seconds=CLOCK_SKEW_SECONDS)
+        self.totals["loaded"] += loaded
+        return loaded
+
+    def release(self, now):
+        """
+        Function to send every message that became due, in send_message_batch calls grouped by physical queue.
+        """
+        due_ids = self.wheel.advance(now.timestamp())
+        for start in range(0, len(due_ids), self.chunk_size):
+            try:
+                self._release_chunk(due_ids[start:start + self.chunk_size], now)
+            except DatabaseError:
+                # Ids not released yet go back into the wheel, so a database outage delays messages instead of
+                # dropping them.
+                self._retry(due_ids[start:], now)
+                raise
+
+    def _release_chunk(self, chunk, now):
+        found = set()
+        groups = defaultdict(list)
+        for scheduled in ScheduledMessageModel.objects.filter(
+            id__in=chunk, sent_at__isnull=True
+        ).select_related("queue"):
+            found.add(scheduled.id)
+            try:
+                physical_queue = route_send_queue(scheduled.queue, scheduled.routing_key, scheduled.priority)
+            except Exception:
+                logger.exception("Failed to route scheduled message %s.", scheduled.id)
+                self._retry([scheduled.id], now)
+                continue
+            groups[physical_queue].append(scheduled)
+
+        # Rows that were deleted or sent by another scheduler are no longer tracked.
+        self.pending.difference_update(set(chunk) - found)
+
+        for physical_queue, group in groups.items():
+            for entries in batched(group, MAX_BATCH_SIZE):
+                self._send(physical_queue, entries, now)
+
+    def _send(self, physical_queue, batch, now):
+        entries = [
+            {
+                "Id": str(scheduled.id),
+                "MessageBody": scheduled.message_body,
+                # Slots are tick_seconds wide, so the remaining seconds are left to SQS.
+                "DelaySeconds": min(MAX_DELAY_SECONDS, max(0, int((scheduled.due_at - now).total_seconds()))),
+            }
+            for scheduled in batch
+        ]
+        try:
+            response = sqs_router.client_for_queue(physical_queue).send_message_batch(
+                QueueUrl=physical_queue.queue_url, Entries=entries
+            )
+        except (BotoCoreError, ClientError, CircuitOpenError):
+            logger.exception("Failed to send %s scheduled messages to %s.", len(batch), physical_queue.queue_name)
+            self._retry([scheduled.id for scheduled in batch], now)
+            return
+
+        successful = {int(entry["Id"]): entry["MessageId"] for entry in response.get("Successful", [])}
+        sent_at = timezone.now()
+        ScheduledMessageModel.objects.bulk_update(
+            [
+                ScheduledMessageModel(id=scheduled_id, sent_at=sent_at, message_id=message_id)
+                for scheduled_id, message_id in successful.items()
+            ],
+            ["sent_at", "message_id"],
+        )
+        self.pending.difference_update(successful)
+        self.totals["sent"] += len(successful)
+        self._retry([scheduled.id for scheduled in batch if scheduled.id not in successful], now)
+
+    def _retry(self, scheduled_ids, now):
+        due = now.timestamp() + self.retry_seconds
+        for scheduled_id in scheduled_ids:
+            self.wheel.add(scheduled_id, due)
+        self.totals["failed"] += len(scheduled_ids)
+
+    def run(self, stop_event=None, on_cycle=None):
+        """
+        Function to load and release scheduled messages every tick until stop_event is set.
+        """
+        stop_event = stop_event or threading.Event()
+        next_load = 0
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() >= next_load:
+                    close_old_connections()
+                    self.load(timezone.now())
+                    next_load = time.monotonic() + self.refresh_seconds
+                self.release(timezone.now())
+            except DatabaseError:
+                logger.exception("Scheduler cycle failed, retrying on the next tick.")
+                close_old_connections()
+            if on_cycle is not None:
+                on_cycle(self)
+            stop_event.wait(self.tick_seconds)
@@ -0,0 +1,152 @@
+import base64
+import json
+import mmap
+import os
+import struct
+
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".ndjson"
+INDEX_SUFFIX = ".idx"
+OFFSET_FORMAT = "<Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+def _segment_path(directory, number, suffix):
+    return os.path.join(directory, "{}{:06d}{}".format(SEGMENT_PREFIX, number, suffix))
+
+
+def list_segments(directory):
+    """
+    Function to list segment numbers present in a capture directory in order.
+    """
+    numbers = []
+    for file_name in os.listdir(directory):
+        if file_name.startswith(SEGMENT_PREFIX) and file_name.endswith(SEGMENT_SUFFIX):
+            numbers.append(int(file_name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+    return sorted(numbers)
+
+
+def encode_message_attributes(message_attributes):
+    """
+    Function to make received message attributes JSON serializable by base64 encoding their binary values.
+    """
+    encoded = {}
+    for name, attribute in message_attributes.items():
+        attribute = dict(attribute)
+        if "BinaryValue" in attribute:
+            attribute["BinaryValue"] = base64.b64encode(attribute["BinaryValue"]).decode("ascii")
+        if "BinaryListValues" in attribute:
+            attribute["BinaryListValues"] = [
+                base64.b64encode(value).decode("ascii") for value in attribute["BinaryListValues"]
+            ]
+        encoded[name] = attribute
+    return encoded
+
+
+def decode_message_attributes(message_attributes):
+    """
+    Function to turn captured message attributes back into the form SendMessage expects.
+    """
+    decoded = {}
+    for name, attribute in message_attributes.items():
+        attribute = dict(attribute)
+        if "BinaryValue" in attribute:
+            attribute["BinaryValue"] = base64.b64decode(attribute["BinaryValue"])
+        if "BinaryListValues" in attribute:
+            attribute["BinaryListValues"] = [base64.b64decode(value) for value in attribute["BinaryListValues"]]
+        decoded[name] = attribute
+    return decoded
+
+
+class SegmentWriter(object):
+    """
+    Class for appending captured messages to NDJSON segment files with a fixed-width offset index.
+    """
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        existing = list_segments(directory)
+        self.segment_number = existing[-1] + 1 if existing else 0
+        self.records_written = 0
+        self._open_segment()
+
+    def _open_segment(self):
+        self.data_file = open(_segment_path(self.directory, self.segment_number, SEGMENT_SUFFIX), "ab")
+        self.index_file = open(_segment_path(self.directory, self.segment_number, INDEX_SUFFIX), "ab")
+        self.position = self.data_file.tell()
+
+    def _close_segment(self):
+        self.flush()
+        self.data_file.close()
+        self.index_file.close()
+
+    def append(self, record):
+        """
+        Function to append one record, rolling over to a new segment when the current one is full.
+        """
+        if self.position >= self.segment_bytes:
+            self._close_segment()
+            self.segment_number += 1
+            self._open_segment()
+
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        self.index_file.write(struct.pack(OFFSET_FORMAT, self.position))
+        self.data_file.write(line)
+        self.position += len(line)
+        self.records_written += 1
+
+    def flush(self):
+        """
+        Function to make every appended record durable on disk.
+        """
+        for file_object in (self.data_file, self.index_file):
+            file_object.flush()
+            os.fsync(file_object.fileno())
+
+    def close(self):
+        self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SegmentReader(object):
+    """
+    Class for iterating captured records from memory-mapped segment files.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _read_segment(self, number):
+        data_path = _segment_path(self.directory, number, SEGMENT_SUFFIX)
+        index_path = _segment_path(self.directory, number, INDEX_SUFFIX)
+        if os.path.getsize(data_path) == 0 or os.path.getsize(index_path) == 0:
+            return
+
+        with open(data_path, "rb") as data_file, open(index_path, "rb") as index_file:
+            with mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                    mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+                # A torn final record from an interrupted export is ignored.
+                count = len(index) // OFFSET_SIZE
+                for position in range(count):
+                    start = struct.unpack_from(OFFSET_FORMAT, index, position * OFFSET_SIZE)[0]
+                    if position + 1 < count:
+                        end = struct.unpack_from(OFFSET_FORMAT, index, (position + 1) * OFFSET_SIZE)[0]
+                    else:
+                        newline = data.find(b"\n", start)
+                        if newline == -1:
+                            return
+                        end = newline + 1
+                    yield json.loads(data[start:end])
+
+    def __iter__(self):
+        for number in list_segments(self.directory):
+            yield from self._read_segment(number)
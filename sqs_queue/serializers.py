@@ -1,7 +1,7 @@
 from rest_framework import serializers
 
 
-from .models import QueueModel
+from .models import QueueLaneModel, QueueModel, QueueShardModel
 
 
 class QueueSerializer(serializers.ModelSerializer):
@@ -11,4 +11,29 @@ class QueueSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = QueueModel
-        fields = ("id", "queue_name", "attributes", "queue_url", "created_at", "updated_at")
+        fields = (
+            "id", "queue_name", "attributes", "queue_url", "region", "profile", "dead_letter_queue",
+            "shard_routing", "has_priority_lanes", "created_at", "updated_at",
+        )
+
+
+class QueueShardSerializer(serializers.ModelSerializer):
+    """
+    Class to create serializer QueueShard model.
+    """
+    physical_queue = QueueSerializer(read_only=True)
+
+    class Meta:
+        model = QueueShardModel
+        fields = ("id", "shard_index", "state", "physical_queue", "created_at", "updated_at")
+
+
+class QueueLaneSerializer(serializers.ModelSerializer):
+    """
+    Class to create serializer QueueLane model.
+    """
+    physical_queue = QueueSerializer(read_only=True)
+
+    class Meta:
+        model = QueueLaneModel
+        fields = ("id", "priority", "weight", "is_default", "physical_queue", "created_at", "updated_at")
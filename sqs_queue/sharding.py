@@ -0,0 +1,386 @@
+import bisect
+import hashlib
+import itertools
+import math
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+from .clients import sqs_router
+from .dead_letter import DEFAULT_MAX_RECEIVE_COUNT, redrive_messages
+from .lanes import get_lanes, lane_metrics, receive_from_lanes, select_lane
+from .models import QueueLaneModel, QueueModel, QueueShardModel
+from .provisioning import (
+    STANDARD_QUEUE_ATTRIBUTES, create_standard_queue, delete_standard_queue, discard_created_queues,
+)
+
+
+DEFAULT_REPLICAS = 100
+STATS_ATTRIBUTES = [
+    "ApproximateNumberOfMessages",
+    "ApproximateNumberOfMessagesNotVisible",
+    "ApproximateNumberOfMessagesDelayed",
+]
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(str(value).encode("utf-8")).digest()[:8], "big")
+
+
+def shard_queue_name(queue_name, shard_index):
+    return "{}-shard-{}".format(queue_name, shard_index)
+
+
+class ConsistentHashRing(object):
+    """
+    Class for mapping routing keys onto shard indexes so resharding only moves a fraction of keys.
+    """
+
+    def __init__(self, nodes, replicas=DEFAULT_REPLICAS):
+        points = sorted(
+            (_hash("{}:{}".format(node, replica)), node)
+            for node in nodes
+            for replica in range(replicas)
+        )
+        self.hashes = [point[0] for point in points]
+        self.nodes = [point[1] for point in points]
+
+    def get(self, key):
+        if not self.hashes:
+            return None
+        position = bisect.bisect(self.hashes, _hash(key)) % len(self.hashes)
+        return self.nodes[position]
+
+
+class ShardRouter(object):
+    """
+    Class for choosing the shard a message is sent to and the order shards are polled in.
+    """
+
+    def __init__(self):
+        self.rings = {}
+        self.counters = defaultdict(itertools.count)
+        self.lock = threading.Lock()
+
+    def _next(self, counter_key):
+        with self.lock:
+            return next(self.counters[counter_key])
+
+    def _ring(self, queue_id, shard_indexes):
+        signature = tuple(shard_indexes)
+        cached = self.rings.get(queue_id)
+        if cached is None or cached[0] != signature:
+            cached = (signature, ConsistentHashRing(signature))
+            self.rings[queue_id] = cached
+        return cached[1]
+
+    def pick_shard(self, queue, shards, routing_key=None):
+        """
+        Function to pick the active shard a message should be sent to.
+        """
+        active = [shard for shard in shards if shard.state == QueueShardModel.ACTIVE]
+        if queue.shard_routing == QueueModel.HASH_ROUTING and routing_key is not None:
+            shard_index = self._ring(queue.id, [shard.shard_index for shard in active]).get(routing_key)
+            return next(shard for shard in active if shard.shard_index == shard_index)
+        return active[self._next((queue.id, "send")) % len(active)]
+
+    def fan_in_order(self, queue, shards):
+        """
+        Function to rotate the polling order so every shard, including draining ones, gets served first in turn.
+        """
+        if not shards:
+            return shards
+        start = self._next((queue.id, "receive")) % len(shards)
+        return shards[start:] + shards[:start]
+
+
+shard_router = ShardRouter()
+
+
+def get_shards(queue):
+    return list(queue.shards.select_related("physical_queue").order_by("shard_index"))
+
+
+def is_logical(queue):
+    """
+    Function to check whether a queue is only a grouping of other physical queues, i.e. sharded or prioritised.
+    """
+    return queue.shard_routing is not None or queue.has_priority_lanes
+
+
+def logical_queue_id(queue):
+    """
+    Function to return the id of the logical queue a physical shard or lane belongs to, the queue's own id otherwise.
+
+    Ledger records are always stored under this id.
+    """
+    if is_logical(queue):
+        return queue.id
+    logical_id = QueueShardModel.objects.filter(physical_queue=queue).values_list("logical_queue_id", flat=True).first()
+    if logical_id is None:
+        logical_id = QueueLaneModel.objects.filter(physical_queue=queue).values_list(
+            "priority_queue_id", flat=True
+        ).first()
+    return logical_id if logical_id is not None else queue.id
+
+
+def physical_queues(queue):
+    """
+    Function to return the SQS-backed queues behind a queue, which is the queue itself unless it is logical.
+    """
+    if queue.has_priority_lanes:
+        return [lane.physical_queue for lane in get_lanes(queue)]
+    if queue.shard_routing is None:
+        return [queue]
+    return [shard.physical_queue for shard in get_shards(queue)]
+
+
+def route_send_queue(queue, routing_key=None, priority=None):
+    """
+    Function to return the physical queue a message for the given queue should be sent to.
+    """
+    if queue.has_priority_lanes:
+        return select_lane(queue, priority).physical_queue
+    if queue.shard_routing is None:
+        return queue
+    return shard_router.pick_shard(queue, get_shards(queue), routing_key).physical_queue
+
+
+def send_targets(queue, priority=None):
+    """
+    Function to return the physical queues bulk sends to a queue are spread over.
+
+    Bulk sends skip per-message routing: they go to every active shard of a sharded queue, or to one lane.
+    """
+    if queue.has_priority_lanes:
+        return [select_lane(queue, priority).physical_queue]
+    if queue.shard_routing is None:
+        return [queue]
+    return [shard.physical_queue for shard in get_shards(queue) if shard.state == QueueShardModel.ACTIVE]
+
+
+def redrive_queue(sqs, queue, max_messages=None, on_progress=None, **redrive_kwargs):
+    """
+    Function to redrive the dead-letter queue of every physical queue behind a queue, returning the combined totals.
+
+    Returns None when none of them has a dead-letter queue.
+    """
+    targets = [
+        physical_queue for physical_queue in physical_queues(queue) if physical_queue.dead_letter_queue_id is not None
+    ]
+    if not targets:
+        return None
+
+    totals = {"moved": 0, "failed": 0, "elapsed_seconds": 0.0}
+    deadline_reached = False
+    for physical_queue in targets:
+        remaining = None if max_messages is None else max_messages - totals["moved"]
+        if deadline_reached or (remaining is not None and remaining <= 0):
+            break
+
+        done = dict(totals)
+
+        def report(snapshot):
+            # Progress is reported across all dead-letter queues, not per queue.
+            on_progress(dict(
+                snapshot, moved=done["moved"] + snapshot["moved"], failed=done["failed"] + snapshot["failed"]
+            ))
+
+        result = redrive_messages(
+            sqs,
+            source_url=physical_queue.dead_letter_queue.queue_url,
+            destination_url=physical_queue.queue_url,
+            max_messages=remaining,
+            on_progress=report if on_progress is not None else None,
+            **redrive_kwargs
+        )
+        for name in totals:
+            totals[name] += result[name]
+        deadline_reached = result["deadline_reached"]
+
+    elapsed = totals["elapsed_seconds"]
+    totals["elapsed_seconds"] = round(elapsed, 3)
+    totals["messages_per_second"] = round(totals["moved"] / elapsed, 2) if elapsed > 0 else 0.0
+    totals["deadline_reached"] = deadline_reached
+    return totals
+
+
+def receive_messages(queue, MaxNumberOfMessages=10, WaitTimeSeconds=10, **receive_kwargs):
+    """
+    Function to receive messages from a queue, fanning in across shards or lanes when it is logical.
+    """
+    if queue.has_priority_lanes:
+        return receive_from_lanes(queue, MaxNumberOfMessages, WaitTimeSeconds, **receive_kwargs)
+    if queue.shard_routing is None:
+        return sqs_router.client_for_queue(queue).receive_message(
+            QueueUrl=queue.queue_url,
+            MaxNumberOfMessages=MaxNumberOfMessages,
+            WaitTimeSeconds=WaitTimeSeconds,
+            **receive_kwargs
+        )
+    return receive_from_shards(queue, MaxNumberOfMessages, WaitTimeSeconds, **receive_kwargs)
+
+
+def receive_from_shards(queue, max_messages=10, wait_time_seconds=10, **receive_kwargs):
+    """
+    Function to receive up to max_messages across all shards of a queue with a fair per-shard quota.
+
+    Returns a receive_message shaped response whose messages carry the QueueId of the shard they came from.
+    """
+    shards = shard_router.fan_in_order(queue, get_shards(queue))
+    collected = []
+    response = {}
+
+    quota = int(math.ceil(max_messages / float(len(shards)))) if shards else 0
+    for shard in shards:
+        remaining = min(quota, max_messages - len(collected))
+        if remaining <= 0:
+            break
+        response = _receive(shard.physical_queue, remaining, 0, receive_kwargs)
+        collected.extend(response.get("Messages", []))
+
+    # Only long-poll when every shard was empty, and only on the shard whose turn it is.
+    if shards and not collected and wait_time_seconds:
+        response = _receive(shards[0].physical_queue, max_messages, wait_time_seconds, receive_kwargs)
+        collected.extend(response.get("Messages", []))
+
+    result = {"ResponseMetadata": response.get("ResponseMetadata", {"HTTPStatusCode": 200})}
+    if collected:
+        result["Messages"] = collected
+    return result
+
+
+def _receive(physical_queue, max_messages, wait_time_seconds, receive_kwargs):
+    response = sqs_router.client_for_queue(physical_queue).receive_message(
+        QueueUrl=physical_queue.queue_url,
+        MaxNumberOfMessages=max_messages,
+        WaitTimeSeconds=wait_time_seconds,
+        **receive_kwargs
+    )
+    for message in response.get("Messages", []):
+        message["QueueId"] = physical_queue.id
+    return response
+
+
+def owning_queue(queue, message):
+    """
+    Function to return the physical queue a received message has to be deleted from.
+    """
+    shard_queue_id = message.get("QueueId")
+    if shard_queue_id is None or shard_queue_id == queue.id:
+        return queue
+    return QueueModel.objects.get(id=shard_queue_id)
+
+
+def create_sharded_queue(sqs, queue_name, shard_count, shard_routing=None, region=None, profile=None,
+                         max_receive_count=DEFAULT_MAX_RECEIVE_COUNT):
+    """
+    Function to create a logical queue backed by shard_count physical queues.
+
+    The rows are saved in one transaction, so a failure partway through stores nothing and deletes the SQS queues it
+    already created.
+    """
+    created_urls = []
+    try:
+        with transaction.atomic():
+            queue = QueueModel.objects.create(
+                queue_name=queue_name,
+                attributes=dict(STANDARD_QUEUE_ATTRIBUTES),
+                region=region,
+                profile=profile,
+                shard_routing=shard_routing or QueueModel.HASH_ROUTING,
+            )
+            for shard_index in range(shard_count):
+                physical_queue = _add_shard(sqs, queue, shard_index, max_receive_count).physical_queue
+                created_urls.extend([physical_queue.queue_url, physical_queue.dead_letter_queue.queue_url])
+    except Exception:
+        discard_created_queues(sqs, created_urls)
+        raise
+    return queue
+
+
+def _add_shard(sqs, queue, shard_index, max_receive_count):
+    response, physical_queue = create_standard_queue(
+        sqs, shard_queue_name(queue.queue_name, shard_index),
+        region=queue.region, profile=queue.profile, max_receive_count=max_receive_count,
+    )
+    return QueueShardModel.objects.create(
+        logical_queue=queue, physical_queue=physical_queue, shard_index=shard_index
+    )
+
+
+def reshard_queue(sqs, queue, shard_count, max_receive_count=DEFAULT_MAX_RECEIVE_COUNT):
+    """
+    Function to grow or shrink a sharded queue without downtime.
+
+    New shards are created before they join the hash ring. Removed shards are only marked draining:
+    producers stop routing to them while consumers keep polling them until they are empty and retired.
+    """
+    shards = {shard.shard_index: shard for shard in get_shards(queue)}
+    for shard_index in range(shard_count):
+        shard = shards.get(shard_index)
+        if shard is None:
+            _add_shard(sqs, queue, shard_index, max_receive_count)
+        elif shard.state == QueueShardModel.DRAINING:
+            shard.state = QueueShardModel.ACTIVE
+            shard.save(update_fields=["state", "updated_at"])
+
+    for shard_index, shard in shards.items():
+        if shard_index >= shard_count and shard.state == QueueShardModel.ACTIVE:
+            shard.state = QueueShardModel.DRAINING
+            shard.save(update_fields=["state", "updated_at"])
+
+    return retire_drained_shards(sqs, queue)
+
+
+def retire_drained_shards(sqs, queue):
+    """
+    Function to delete draining shards that no longer hold any messages, returning the retired shard indexes.
+    """
+    retired = []
+    for shard in get_shards(queue):
+        if shard.state != QueueShardModel.DRAINING:
+            continue
+        if sum(get_queue_counts(shard.physical_queue).values()) > 0:
+            continue
+        delete_standard_queue(sqs, shard.physical_queue)
+        retired.append(shard.shard_index)
+    return retired
+
+
+def get_queue_counts(physical_queue):
+    response = sqs_router.client_for_queue(physical_queue).get_queue_attributes(
+        QueueUrl=physical_queue.queue_url, AttributeNames=STATS_ATTRIBUTES
+    )
+    attributes = response.get("Attributes", {})
+    return {name: int(attributes.get(name, 0)) for name in STATS_ATTRIBUTES}
+
+
+def collect_queue_stats(queue):
+    """
+    Function to collect message counts for a queue, summed across its shards or lanes when it is logical.
+
+    Lane received counts and latencies come from lane_metrics and only cover receives made by this process, e.g.
+    through the receive endpoints; the consume_priority_queue command reports its own.
+    """
+    totals = dict.fromkeys(STATS_ATTRIBUTES, 0)
+    shards = []
+    lanes = []
+    if queue.has_priority_lanes:
+        for lane in get_lanes(queue):
+            counts = get_queue_counts(lane.physical_queue)
+            for name, value in counts.items():
+                totals[name] += value
+            lanes.append(dict(counts, priority=lane.priority, weight=lane.weight, queue_id=lane.physical_queue.id,
+                              **lane_metrics.snapshot(lane)))
+    elif queue.shard_routing is None:
+        totals.update(get_queue_counts(queue))
+    else:
+        for shard in get_shards(queue):
+            counts = get_queue_counts(shard.physical_queue)
+            for name, value in counts.items():
+                totals[name] += value
+            shards.append(dict(counts, shard_index=shard.shard_index, state=shard.state,
+                               queue_id=shard.physical_queue.id))
+    return {"queue_id": queue.id, "queue_name": queue.queue_name, "totals": totals, "shards": shards, "lanes": lanes}
@@ -0,0 +1,49 @@
+import datetime
+import json
+
+import numpy as np
+
+from .batching import MAX_BATCH_SIZE
+
+
+EPOCH = np.datetime64("1970-01-01", "D")
+ORDER_BODY_TEMPLATE = (
+    '{{"order_id": "{}", "order_date": "{}", "total_value": {}, '
+    '"status": "ORDER_PLACED", "sequence_id": {}}}'
+)
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def generate_orders(rng, count):
+    """
+    Function to generate order ids, dates and values as arrays in a single vectorized pass.
+    """
+    # Same ranges as fake.random_number(digits=7), fake.date() and fake.random_number(digits=4).
+    max_days = (np.datetime64(datetime.date.today(), "D") - EPOCH).astype(np.int64) + 1
+    order_ids = rng.integers(0, 10 ** 7, size=count)
+    order_dates = EPOCH + rng.integers(0, max_days, size=count).astype("timedelta64[D]")
+    total_values = rng.integers(0, 10 ** 4, size=count)
+    return order_ids.astype(str), order_dates.astype(str), total_values.astype(str)
+
+
+def iter_order_batches(count, sequence_id=None, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Function to yield send_message_batch entry lists for count synthetic orders, chunk by chunk.
+    """
+    rng = np.random.default_rng(seed)
+    sequence = json.dumps(sequence_id)
+    produced = 0
+
+    while produced < count:
+        size = min(chunk_size, count - produced)
+        order_ids, order_dates, total_values = generate_orders(rng, size)
+        bodies = [
+            ORDER_BODY_TEMPLATE.format(order_id, order_date, total_value, sequence)
+            for order_id, order_date, total_value in zip(order_ids.tolist(), order_dates.tolist(), total_values.tolist())
+        ]
+        for start in range(0, size, MAX_BATCH_SIZE):
+            yield [
+                {"Id": str(index), "MessageBody": body}
+                for index, body in enumerate(bodies[start:start + MAX_BATCH_SIZE])
+            ]
+        produced += size
@@ -1,3 +1,691 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import boto3
+from botocore.exceptions import ParamValidationError, ReadTimeoutError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils import timezone
+
+from .clients import LocationNotAllowed, SQSClient, SQSClientRouter
+from .dead_letter import RedriveProgress
+from .lanes import LaneScheduler, clean_lanes
+from .ledger import LedgerWriter, parse_time_range
+from .models import QueueModel
+from .profiling import ProfilingMiddleware, maybe_profile
+from .resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceeded, _before_parameter_build, _needs_retry, bind_deadline,
+    breakers, current_deadline, deadline_scope, install_guards,
+)
+from .scheduler import TimingWheel
+from .segments import (
+    SegmentReader, SegmentWriter, decode_message_attributes, encode_message_attributes, list_segments,
+)
+from .sharding import ConsistentHashRing
+from .synthetic import iter_order_batches
+from .webhooks import WebhookWorkerPool, WorkerPoolFull
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """
+    Class to test circuit breaker state transitions.
+    """
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("sqs_queue.resilience.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, latency_threshold=1, reset_timeout=30)
+
+    def test_opens_after_failure_threshold(self):
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_slow_calls_count_as_failures(self):
+        self.breaker.record_latency(5)
+        self.breaker.record_latency(5)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_latency(0.1)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_lets_one_trial_through_and_closes_on_success(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record_latency(0.1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.before_call()
+
+    def test_half_open_reopens_on_failed_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+
+class ClientGuardTests(SimpleTestCase):
+    """
+    Class to test the breaker hooks installed on an SQS client.
+    """
+
+    queue_url = "https://sqs.us-east-1.amazonaws.com/123456789012/guard-test"
+
+    def setUp(self):
+        self.client = install_guards(boto3.client(
+            "sqs", region_name="us-east-1", aws_access_key_id="test", aws_secret_access_key="test"
+        ))
+        self.breaker = breakers.get(self.queue_url, "SendMessage")
+        self.addCleanup(breakers.breakers.pop, (self.queue_url, "SendMessage"), None)
+
+    def test_invalid_parameters_do_not_claim_half_open_trial(self):
+        self.breaker.state = CircuitBreaker.HALF_OPEN
+
+        with self.assertRaises(ParamValidationError):
+            self.client.send_message(QueueUrl=self.queue_url)
+
+        self.assertFalse(self.breaker.trial_in_flight)
+        self.breaker.before_call()
+        self.assertTrue(self.breaker.trial_in_flight)
+
+
+@override_settings(SQS_CONNECT_TIMEOUT=2, SQS_SHORT_READ_TIMEOUT=3, SQS_DEADLINE_MARGIN_SECONDS=1)
+class DeadlineTests(SimpleTestCase):
+    """
+    Class to test that SQS calls are fitted into the request deadline.
+    """
+
+    receive_model = SimpleNamespace(name="ReceiveMessage")
+
+    def test_long_poll_wait_is_shortened_to_fit(self):
+        params = {"QueueUrl": "url", "WaitTimeSeconds": 20}
+        with deadline_scope(15):
+            _before_parameter_build(params, self.receive_model, {})
+        self.assertEqual(params["WaitTimeSeconds"], 8)
+
+    def test_queue_default_wait_is_shortened_to_fit(self):
+        params = {"QueueUrl": "url"}
+        with deadline_scope(15):
+            _before_parameter_build(params, self.receive_model, {})
+        self.assertEqual(params["WaitTimeSeconds"], 8)
+
+    def test_call_that_cannot_fit_is_refused(self):
+        with deadline_scope(5), self.assertRaises(DeadlineExceeded):
+            _before_parameter_build({"QueueUrl": "url"}, SimpleNamespace(name="SendMessage"), {})
+
+    def test_retry_is_only_made_when_delay_and_attempt_fit(self):
+        retry_handler = mock.Mock(**{"needs_retry.return_value": 0.5})
+        with deadline_scope(8) as deadline:
+            request_dict = {"context": {"deadline": deadline, "wait_seconds": 0}}
+            self.assertEqual(_needs_retry(retry_handler, request_dict=request_dict), 0.5)
+
+            deadline.expires_at -= 2
+            self.assertIsNone(_needs_retry(retry_handler, request_dict=request_dict))
+
+    def test_errors_that_are_not_retried_stay_that_way(self):
+        retry_handler = mock.Mock(**{"needs_retry.return_value": None})
+        request_dict = {"context": {"deadline": None, "wait_seconds": 0}}
+        self.assertIsNone(_needs_retry(retry_handler, request_dict=request_dict))
+
+    def test_deadline_is_passed_to_executor_workers(self):
+        with deadline_scope(15) as deadline, ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertIsNone(executor.submit(current_deadline).result())
+            self.assertIs(executor.submit(bind_deadline(current_deadline)).result(), deadline)
+
+
+class RedriveProgressTests(SimpleTestCase):
+    """
+    Class to test that redrive workers never move more than max_messages between them.
+    """
+
+    def test_claims_are_capped_at_max_messages(self):
+        progress = RedriveProgress(max_messages=25)
+        self.assertEqual([progress.claim(10) for _ in range(4)], [10, 10, 5, 0])
+
+    def test_unused_claims_are_released(self):
+        progress = RedriveProgress(max_messages=25)
+        first, second, third = progress.claim(10), progress.claim(10), progress.claim(10)
+        progress.record(first, 4, 1)
+        progress.record(second, 10, 0)
+        progress.record(third, 5, 0)
+
+        self.assertEqual(progress.claim(10), 6)
+        snapshot = progress.snapshot()
+        self.assertEqual((snapshot["moved"], snapshot["failed"]), (19, 1))
+
+    def test_stopping_at_deadline_releases_claims(self):
+        progress = RedriveProgress(max_messages=10)
+        progress.stop_at_deadline(progress.claim(10))
+
+        self.assertTrue(progress.snapshot()["deadline_reached"])
+        self.assertEqual(progress.claim(10), 10)
+
+    def test_claims_are_not_capped_without_max_messages(self):
+        progress = RedriveProgress()
+        self.assertEqual(progress.claim(10), 10)
+        progress.record(10, 10, 0)
+        self.assertEqual(progress.claimed, 0)
+
+
+@override_settings(SQS_CONNECT_TIMEOUT=2, SQS_SHORT_READ_TIMEOUT=3, SQS_DEADLINE_MARGIN_SECONDS=1)
+class SQSClientTests(SimpleTestCase):
+    """
+    Class to test that calls get a read timeout matching their long-poll wait.
+    """
+
+    def setUp(self):
+        self.build_client = mock.Mock(side_effect=lambda read_timeout: mock.Mock(read_timeout=read_timeout))
+        self.client = SQSClient(mock.Mock(), self.build_client)
+
+    def test_receives_use_a_client_for_their_wait(self):
+        self.client.receive_message(QueueUrl="url")
+        self.client.receive_message(QueueUrl="url", WaitTimeSeconds=10)
+        self.client.receive_message(QueueUrl="url", WaitTimeSeconds=10)
+        self.client.receive_message(QueueUrl="url", WaitTimeSeconds=0)
+        self.client.send_message(QueueUrl="url", MessageBody="body")
+
+        self.assertEqual(self.client.long_poll_clients[20].read_timeout, 23)
+        self.assertEqual(self.client.long_poll_clients[10].receive_message.call_count, 2)
+        self.assertEqual(self.build_client.call_count, 2)
+        self.assertEqual(self.client.client.receive_message.call_count, 1)
+        self.assertEqual(self.client.client.send_message.call_count, 1)
+
+    def test_receive_is_shortened_before_choosing_its_client(self):
+        with deadline_scope(15):
+            self.client.receive_message(QueueUrl="url")
+
+        self.client.long_poll_clients[8].receive_message.assert_called_once_with(QueueUrl="url", WaitTimeSeconds=8)
+        self.assertEqual(self.client.long_poll_clients[8].read_timeout, 11)
+
+
+@override_settings(SQS_ALLOWED_REGIONS=["eu-west-1"], SQS_ALLOWED_PROFILES=["reporting"])
+class SQSClientRouterTests(SimpleTestCase):
+    """
+    Class to test that clients are only handed out for allowed locations and that queues resolve to local replicas.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"AWS_REGION": "us-east-1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = SQSClientRouter()
+        patcher = mock.patch.object(self.router, "_build_client", side_effect=lambda key, read_timeout: mock.Mock())
+        self.build_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_clients_are_pooled_per_location(self):
+        self.assertIs(self.router.get_client(), self.router.get_client(region="us-east-1"))
+        self.assertIsNot(self.router.get_client(), self.router.get_client(region="eu-west-1"))
+        self.assertIsNot(self.router.get_client(), self.router.get_client(profile="reporting"))
+        self.assertEqual(self.build_client.call_count, 3)
+
+    def test_unlisted_locations_are_refused(self):
+        with self.assertRaises(LocationNotAllowed):
+            self.router.get_client(region="ap-south-1")
+        with self.assertRaises(LocationNotAllowed):
+            self.router.get_client(profile="admin")
+        self.build_client.assert_not_called()
+
+    def test_queue_in_the_region_is_its_own_replica(self):
+        queue = QueueModel(queue_name="orders", region="us-east-1")
+        with mock.patch.object(QueueModel, "objects") as objects:
+            self.assertIs(self.router.local_replica(queue), queue)
+        objects.filter.assert_not_called()
+
+    def test_replica_in_the_local_region_is_used(self):
+        queue = QueueModel(queue_name="orders", region="eu-west-1")
+        replica = QueueModel(queue_name="orders", region="us-east-1")
+        with mock.patch.object(QueueModel, "objects") as objects:
+            objects.filter.return_value.first.return_value = replica
+            self.assertIs(self.router.local_replica(queue), replica)
+        self.assertEqual(objects.filter.call_args[1], {"queue_name": "orders"})
+
+    def test_queue_without_replica_is_kept(self):
+        queue = QueueModel(queue_name="orders", region="eu-west-1")
+        with mock.patch.object(QueueModel, "objects") as objects:
+            objects.filter.return_value.first.return_value = None
+            self.assertIs(self.router.local_replica(queue), queue)
+
+
+@override_settings(
+    SQS_CONNECT_TIMEOUT=0.2, SQS_SHORT_READ_TIMEOUT=0.2, SQS_DEADLINE_MARGIN_SECONDS=0, SQS_MAX_ATTEMPTS=2,
+    SQS_ALLOWED_REGIONS=["us-east-1"],
+)
+class HangingTransportTests(SimpleTestCase):
+    """
+    Class to test that a receive from an SQS endpoint that never answers ends within the request deadline.
+    """
+
+    def setUp(self):
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(8)
+        self.addCleanup(self.server.close)
+        self.connections = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+        patcher = mock.patch.dict(os.environ, {"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.endpoint_url = "http://127.0.0.1:{}".format(self.server.getsockname()[1])
+
+    def _accept(self):
+        # Connections are accepted and never answered, like a hung SQS endpoint.
+        while True:
+            try:
+                self.connections.append(self.server.accept()[0])
+            except OSError:
+                return
+
+    def test_receive_ends_within_deadline(self):
+        sqs = SQSClientRouter().get_client(region="us-east-1", endpoint_url=self.endpoint_url)
+        queue_url = self.endpoint_url + "/123456789012/hanging"
+        self.addCleanup(breakers.breakers.pop, (queue_url, "ReceiveMessage"), None)
+
+        started_at = time.monotonic()
+        with deadline_scope(1.5), self.assertRaises(ReadTimeoutError):
+            sqs.receive_message(QueueUrl=queue_url, WaitTimeSeconds=20)
+
+        self.assertLess(time.monotonic() - started_at, 1.5)
+
+
+class LaneSchedulerTests(SimpleTestCase):
+    """
+    Class to test weighted fair ordering of priority queue lanes.
+    """
+
+    def setUp(self):
+        self.queue = SimpleNamespace(id=1)
+        self.high = SimpleNamespace(id=10, weight=3)
+        self.low = SimpleNamespace(id=11, weight=1)
+        self.scheduler = LaneScheduler()
+
+    def test_lanes_are_chosen_in_proportion_to_weight(self):
+        chosen = [self.scheduler.order(self.queue, [self.high, self.low])[0] for _ in range(8)]
+        self.assertEqual(chosen.count(self.high), 6)
+        self.assertEqual(chosen.count(self.low), 2)
+
+    def test_low_weight_lane_is_not_starved(self):
+        chosen = [self.scheduler.order(self.queue, [self.high, self.low])[0] for _ in range(8)]
+        for start in range(0, 8, 4):
+            self.assertIn(self.low, chosen[start:start + 4])
+
+    def test_other_lanes_follow_by_weight(self):
+        medium = SimpleNamespace(id=12, weight=2)
+        order = self.scheduler.order(self.queue, [self.low, medium, self.high])
+        self.assertEqual(order, [self.high, medium, self.low])
+
+
+class CleanLanesTests(SimpleTestCase):
+    """
+    Class to test validating lane definitions from a request.
+    """
+
+    def test_valid_lanes_are_cleaned(self):
+        lanes = clean_lanes("orders", [{"priority": "high", "weight": "3"}, {"priority": "low"}], "low")
+        self.assertEqual(lanes, [{"priority": "high", "weight": 3}, {"priority": "low", "weight": 1}])
+
+    def test_invalid_lanes_are_rejected(self):
+        for lanes in (
+            None, "high", [], ["high"], [{"priority": ["high"]}], [{"priority": "has space"}],
+            [{"priority": "a" * 31}], [{"priority": "high", "weight": "x"}], [{"priority": "high", "weight": 0}],
+            [{"priority": "high", "weight": True}], [{"priority": "high"}, {"priority": "high"}],
+        ):
+            self.assertIsNone(clean_lanes("orders", lanes), lanes)
+
+    def test_lane_queue_names_must_fit_sqs(self):
+        self.assertIsNone(clean_lanes("o" * 72, [{"priority": "high"}]))
+
+    def test_default_priority_must_be_a_lane(self):
+        self.assertIsNone(clean_lanes("orders", [{"priority": "high"}], default_priority="low"))
+        self.assertIsNone(clean_lanes("orders", [{"priority": "high"}], default_priority=["high"]))
+
+
+class TimingWheelTests(SimpleTestCase):
+    """
+    Class to test releasing items from the timing wheel.
+    """
+
+    def setUp(self):
+        self.wheel = TimingWheel(tick_seconds=1, slot_count=4, start=100)
+
+    def test_items_are_released_when_due(self):
+        self.wheel.add("a", 101.5)
+        self.wheel.add("b", 103)
+
+        self.assertEqual(self.wheel.advance(100.5), [])
+        self.assertEqual(self.wheel.advance(101.9), ["a"])
+        self.assertEqual(self.wheel.advance(103), ["b"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_overdue_items_are_released_on_next_advance(self):
+        self.wheel.add("late", 50)
+        self.assertEqual(self.wheel.advance(100), ["late"])
+
+    def test_overflow_items_migrate_into_slots(self):
+        self.wheel.add("far", 110)
+        self.wheel.add("near", 102)
+        self.assertEqual(len(self.wheel.overflow), 1)
+
+        self.assertEqual(self.wheel.advance(102), ["near"])
+        self.assertEqual(self.wheel.advance(109), [])
+        self.assertEqual(self.wheel.overflow, [])
+        self.assertEqual(self.wheel.advance(110), ["far"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_released_item_can_be_retried(self):
+        self.wheel.add("retry", 101)
+        self.assertEqual(self.wheel.advance(101), ["retry"])
+
+        self.wheel.add("retry", 101 + 30)
+        self.assertEqual(self.wheel.advance(130), [])
+        self.assertEqual(self.wheel.advance(131), ["retry"])
+
+
+class ConsistentHashRingTests(SimpleTestCase):
+    """
+    Class to test that resharding only moves keys onto the new shard.
+    """
+
+    keys = ["order-{}".format(number) for number in range(2000)]
+
+    def test_mapping_is_stable(self):
+        first = ConsistentHashRing([0, 1, 2, 3])
+        second = ConsistentHashRing([0, 1, 2, 3])
+        self.assertEqual([first.get(key) for key in self.keys], [second.get(key) for key in self.keys])
+
+    def test_adding_a_shard_only_moves_keys_to_it(self):
+        before = ConsistentHashRing([0, 1, 2, 3])
+        after = ConsistentHashRing([0, 1, 2, 3, 4])
+
+        moved = [key for key in self.keys if before.get(key) != after.get(key)]
+        self.assertTrue(all(after.get(key) == 4 for key in moved))
+        self.assertLess(len(moved), len(self.keys) * 0.35)
+
+    def test_empty_ring_returns_none(self):
+        self.assertIsNone(ConsistentHashRing([]).get("order-1"))
+
+
+class SegmentTests(SimpleTestCase):
+    """
+    Class to test writing and reading captured messages in segment files.
+    """
+
+    records = [{"MessageId": str(number), "Body": "x" * number} for number in range(30)]
+
+    def test_round_trip_across_segments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentWriter(directory, segment_bytes=200) as writer:
+                for record in self.records:
+                    writer.append(record)
+
+            self.assertGreater(len(list_segments(directory)), 1)
+            self.assertEqual(list(SegmentReader(directory)), self.records)
+
+    def test_reopened_writer_appends_new_segments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentWriter(directory) as writer:
+                writer.append(self.records[0])
+            with SegmentWriter(directory) as writer:
+                writer.append(self.records[1])
+
+            self.assertEqual(list_segments(directory), [0, 1])
+            self.assertEqual(list(SegmentReader(directory)), self.records[:2])
+
+    def test_torn_final_record_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentWriter(directory) as writer:
+                writer.append(self.records[0])
+                writer.append(self.records[1])
+                writer.data_file.truncate(writer.position - 1)
+
+            self.assertEqual(list(SegmentReader(directory)), self.records[:1])
+
+    def test_binary_message_attributes_round_trip(self):
+        message_attributes = {
+            "checksum": {"DataType": "Binary", "BinaryValue": b"\x00\xff"},
+            "parts": {"DataType": "Binary", "BinaryListValues": [b"\x01", b"\x02"]},
+            "source": {"DataType": "String", "StringValue": "orders"},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentWriter(directory) as writer:
+                writer.append({"message_attributes": encode_message_attributes(message_attributes)})
+
+            record = next(iter(SegmentReader(directory)))
+        self.assertEqual(decode_message_attributes(record["message_attributes"]), message_attributes)
+
+
+class OrderBatchTests(SimpleTestCase):
+    """
+    Class to test the synthetic order batches sent by the bulk send endpoint.
+    """
+
+    def test_batches_add_up_to_count(self):
+        batches = list(iter_order_batches(23, chunk_size=7))
+        self.assertEqual([len(batch) for batch in batches], [7, 7, 7, 2])
+        self.assertTrue(all(
+            [entry["Id"] for entry in batch] == [str(index) for index in range(len(batch))] for batch in batches
+        ))
+
+    def test_chunks_are_split_into_full_batches(self):
+        batches = list(iter_order_batches(45, chunk_size=20))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 10, 10, 5])
+
+    def test_bodies_are_order_json(self):
+        for sequence_id in (None, 7, "run-1"):
+            body = json.loads(next(iter_order_batches(1, sequence_id=sequence_id))[0]["MessageBody"])
+            self.assertEqual(set(body), {"order_id", "order_date", "total_value", "status", "sequence_id"})
+            self.assertEqual(body["status"], "ORDER_PLACED")
+            self.assertEqual(body["sequence_id"], sequence_id)
+            self.assertLess(int(body["order_id"]), 10 ** 7)
+            self.assertLess(int(body["total_value"]), 10 ** 4)
+            self.assertLessEqual(datetime.date.fromisoformat(body["order_date"]), datetime.date.today())
+
+    def test_seed_makes_orders_repeatable(self):
+        self.assertEqual(list(iter_order_batches(15, seed=3)), list(iter_order_batches(15, seed=3)))
+
+
+class LedgerWriterTests(SimpleTestCase):
+    """
+    Class to test that ledger records are written in batches on size and time thresholds.
+    """
+
+    def setUp(self):
+        self.writer = LedgerWriter(batch_size=3, flush_seconds=5)
+        self.writer.flusher = mock.Mock()
+        patcher = mock.patch.object(self.writer, "_write")
+        self.write = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, count):
+        received_at = timezone.now()
+        for number in range(count):
+            self.writer.record(1, "message-{}".format(number), received_at)
+
+    def test_records_are_written_when_batch_is_full(self):
+        self.record(2)
+        self.write.assert_not_called()
+
+        self.record(2)
+        self.assertEqual(self.write.call_count, 1)
+        self.assertEqual(len(self.write.call_args[0][0]), 3)
+        self.assertEqual(len(self.writer.buffer), 1)
+
+    def test_partial_batch_is_written_on_each_interval(self):
+        self.record(2)
+        with mock.patch("sqs_queue.ledger.time.sleep", side_effect=[None, StopIteration]) as sleep, \
+                mock.patch("sqs_queue.ledger.close_old_connections"), self.assertRaises(StopIteration):
+            self.writer._flush_periodically()
+
+        sleep.assert_called_with(5)
+        self.assertEqual(self.write.call_count, 1)
+        self.assertEqual(len(self.write.call_args[0][0]), 2)
+        self.assertEqual(self.writer.buffer, [])
+
+    def test_empty_buffer_is_not_written(self):
+        self.writer.flush()
+        self.write.assert_not_called()
+
+
+@override_settings(TIME_ZONE="UTC")
+class TimeRangeTests(SimpleTestCase):
+    """
+    Class to test parsing the ledger summary time range.
+    """
+
+    def test_since_defaults_to_an_hour_before_until(self):
+        since, until = parse_time_range(None, "2026-01-01T12:00:00Z")
+        self.assertEqual(until - since, datetime.timedelta(hours=1))
+
+    def test_naive_values_are_made_aware(self):
+        since, until = parse_time_range("2026-01-01T11:00:00", "2026-01-01T12:00:00+00:00")
+        self.assertTrue(timezone.is_aware(since))
+        self.assertEqual(until - since, datetime.timedelta(hours=1))
+
+    def test_invalid_values_are_rejected(self):
+        self.assertIsNone(parse_time_range(None, "garbage"))
+        self.assertIsNone(parse_time_range("garbage", None))
+        self.assertIsNone(parse_time_range("2026-13-01T00:00:00", None))
+        self.assertIsNone(parse_time_range("2026-01-01T12:00:00Z", "2026-01-01T11:00:00Z"))
+
+
+@override_settings(PROFILING_CONSUMER_SAMPLE_RATE=0)
+class WebhookWorkerPoolTests(SimpleTestCase):
+    """
+    Class to test that the webhook pool rejects payloads past its queue capacity and reports its metrics.
+    """
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.started = threading.Semaphore(0)
+
+    def handler(self, payload):
+        self.started.release()
+        self.release.wait(5)
+        if payload == "bad":
+            raise ValueError(payload)
+
+    def test_payloads_past_capacity_are_rejected(self):
+        pool = WebhookWorkerPool(self.handler, workers=1, max_queue_size=1)
+        pool.submit("first")
+        self.assertTrue(self.started.acquire(timeout=5))
+        pool.submit("queued")
+
+        with self.assertRaises(WorkerPoolFull):
+            pool.submit("rejected")
+        metrics = pool.metrics()
+        self.assertEqual(
+            (metrics["in_flight"], metrics["queue_depth"], metrics["accepted"], metrics["rejected"]), (1, 1, 2, 1)
+        )
+
+        self.release.set()
+        pool.queue.join()
+        self.assertEqual(pool.metrics()["completed"], 2)
+
+    def test_metrics_count_failures_and_times(self):
+        pool = WebhookWorkerPool(self.handler, workers=2, max_queue_size=4)
+        self.release.set()
+        with self.assertLogs("sqs_queue.webhooks", "ERROR"):
+            for payload in ("ok", "bad", "ok"):
+                pool.submit(payload)
+            pool.queue.join()
+
+        metrics = pool.metrics()
+        self.assertEqual((metrics["completed"], metrics["failed"], metrics["in_flight"]), (2, 1, 0))
+        self.assertEqual(metrics["queue_capacity"], 4)
+        self.assertIsNotNone(metrics["wait_seconds_p95"])
+        self.assertIsNotNone(metrics["processing_seconds_p50"])
+
+    @override_settings(WEBHOOK_RETRY_AFTER_SECONDS=7)
+    def test_full_pool_returns_429_with_retry_after(self):
+        with mock.patch("sqs_queue.views.webhook_pool.submit", side_effect=WorkerPoolFull):
+            response = self.client.post("/queue/receiveLambdaMessage", {"Records": []}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertEqual(response.json()["status_code"], 429)
+
+
+@override_settings(PROFILING_HEADER_ENABLED=False, PROFILING_SAMPLE_RATE=0, PROFILING_MODE="cprofile")
+class ProfilingMiddlewareTests(SimpleTestCase):
+    """
+    Class to test which requests are profiled and what is written for them.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patcher = override_settings(PROFILING_DIR=self.directory)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.middleware = ProfilingMiddleware(lambda request: HttpResponse(status=201))
+        self.factory = RequestFactory()
+
+    def profiles(self, suffix):
+        return [file_name for file_name in os.listdir(self.directory) if file_name.endswith(suffix)]
+
+    def test_requests_are_not_profiled_by_default(self):
+        response = self.middleware(self.factory.get("/queue/listQueues", HTTP_X_PROFILE="sample"))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    @override_settings(PROFILING_HEADER_ENABLED=True)
+    def test_header_picks_the_mode(self):
+        self.middleware(self.factory.post("/queue/sendMessage/3/", HTTP_X_PROFILE="sample"))
+        self.assertEqual(len(self.profiles(".collapsed")), 1)
+
+        with open(os.path.join(self.directory, self.profiles(".json")[0])) as metadata_file:
+            metadata = json.load(metadata_file)
+        self.assertEqual(metadata["mode"], "sample")
+        self.assertEqual((metadata["method"], metadata["path"]), ("POST", "/queue/sendMessage/3/"))
+        self.assertEqual(metadata["status_code"], 201)
+
+    @override_settings(PROFILING_HEADER_ENABLED=True)
+    def test_unknown_header_value_uses_the_default_mode(self):
+        self.middleware(self.factory.get("/queue/listQueues", HTTP_X_PROFILE="1"))
+        self.assertEqual(len(self.profiles(".prof")), 1)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.5)
+    def test_requests_are_sampled_at_the_rate(self):
+        with mock.patch("sqs_queue.profiling.random.random", side_effect=[0.9, 0.1]):
+            self.middleware(self.factory.get("/queue/listQueues"))
+            self.assertEqual(os.listdir(self.directory), [])
+            self.middleware(self.factory.get("/queue/listQueues"))
+        self.assertEqual(len(self.profiles(".prof")), 1)
+
+    def test_consumers_are_not_profiled_at_zero_rate(self):
+        with maybe_profile("webhook-consumer", 0) as metadata:
+            self.assertIsNone(metadata)
+        self.assertEqual(os.listdir(self.directory), [])
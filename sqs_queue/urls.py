@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     CreateStandardQueueAPIView,
+    CreatePriorityQueueAPIView,
     SendMessageAPIView,
     ReceiveMessageAPIView,
     DeleteMessageAPIView,
@@ -8,10 +9,17 @@ from .views import (
     GetQueueUrlAPIView,
     DeleteQueueAPIView,
     ReceiveLambdaMessageAPIView,
+    ReceiveLambdaMessageStatsAPIView,
+    RedriveMessagesAPIView,
+    SendSyntheticOrdersAPIView,
+    QueueStatsAPIView,
+    ReshardQueueAPIView,
+    LedgerSummaryAPIView,
 )
 
 urlpatterns = [
     path("createStandardQueue", CreateStandardQueueAPIView.as_view(), name="create-queue"),
+    path("createPriorityQueue", CreatePriorityQueueAPIView.as_view(), name="create-priority-queue"),
     path("sendMessage/<int:pk>/", SendMessageAPIView.as_view(), name="send-message"),
     path("receiveMessage/<int:pk>/", ReceiveMessageAPIView.as_view(), name="receive-message"),
     path("deleteMessage/<int:pk>/", DeleteMessageAPIView.as_view(), name="delete-message"),
@@ -19,6 +27,12 @@ urlpatterns = [
     path("getQueueUrl/<int:pk>/", GetQueueUrlAPIView.as_view(), name="get-queue-url"),
     path("deleteQueue/<int:pk>/", DeleteQueueAPIView.as_view(), name="delete-queue"),
     path("receiveLambdaMessage", ReceiveLambdaMessageAPIView.as_view(), name="receive-lambda-message"),
+    path("receiveLambdaMessage/stats", ReceiveLambdaMessageStatsAPIView.as_view(), name="receive-lambda-message-stats"),
+    path("redriveMessages/<int:pk>/", RedriveMessagesAPIView.as_view(), name="redrive-messages"),
+    path("sendSyntheticOrders/<int:pk>/", SendSyntheticOrdersAPIView.as_view(), name="send-synthetic-orders"),
+    path("queueStats/<int:pk>/", QueueStatsAPIView.as_view(), name="queue-stats"),
+    path("reshardQueue/<int:pk>/", ReshardQueueAPIView.as_view(), name="reshard-queue"),
+    path("ledgerSummary/<int:pk>/", LedgerSummaryAPIView.as_view(), name="ledger-summary"),
 
     # path("listQueues", ),
     # path("sendMessaageBatch", ),
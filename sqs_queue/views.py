@@ -1,9 +1,10 @@
 import datetime
 import json
-import os
-import boto3
+from botocore.exceptions import InvalidRegionError, ProfileNotFound
+from django.conf import settings
+from django.utils import timezone
 from faker import Faker
-from .models import QueueModel
+from .models import QueueLaneModel, QueueModel
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.generics import (
@@ -15,8 +16,32 @@ from rest_framework.generics import (
 )
 
 from utilities import messages
-from .serializers import QueueSerializer
+from .serializers import QueueLaneSerializer, QueueSerializer, QueueShardSerializer
 from utilities.utils import ResponseInfo
+from .dead_letter import DEFAULT_MAX_RECEIVE_COUNT, MAX_RECEIVE_COUNT_LIMIT
+from .batching import send_message_batches
+from .synthetic import iter_order_batches
+from .clients import LocationNotAllowed, bulk_router, sqs_router
+from .provisioning import create_standard_queue, delete_standard_queue
+from .lanes import clean_lanes, create_priority_queue, get_lanes, select_lane
+from .sharding import (
+    collect_queue_stats,
+    create_sharded_queue,
+    get_shards,
+    is_logical,
+    logical_queue_id,
+    owning_queue,
+    physical_queues,
+    receive_messages,
+    redrive_queue,
+    reshard_queue,
+    route_send_queue,
+    send_targets,
+)
+from .webhooks import WorkerPoolFull, webhook_pool
+from .ledger import ledger_writer, parse_time_range, sent_timestamp, summarize_ledger
+from .resilience import CircuitOpenError, DeadlineExceeded
+from .scheduler import MAX_DELAY_SECONDS, schedule_message
 
 
 Faker.seed(0)
@@ -42,44 +67,157 @@ class CreateStandardQueueAPIView(CreateAPIView):
         """
         Post method to create SQS Queue.
         """
+        region = request.data.get("region") or sqs_router.local_region
+        profile = request.data.get("profile")
 
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
-
+            sqs = sqs_router.get_client(region=region, profile=profile)
             queue_name = request.data.get("queue_name")
-            attributes = {
-                "DelaySeconds": "0",          # 0-900 sec Default = 0
-                "MaximumMessageSize": "262144",      # 1024-262144 Default = 262144(256 KiB)
-                "MessageRetentionPeriod": "345600",         # 60-1,209,600 sec Default = 345600(4 days)
-                "ReceiveMessageWaitTimeSeconds": "20",         # 0-20 sec Default 0
-                "VisibilityTimeout": "43200"                  # 0-43200 sec Default 30 sec
-            }
+            max_receive_count = request.data.get("max_receive_count", DEFAULT_MAX_RECEIVE_COUNT)
+            shard_count = request.data.get("shard_count", 1)
+            shard_routing = request.data.get("shard_routing")
 
-            response = sqs.create_queue(
-                QueueName=queue_name,
-                Attributes=attributes
-            )
-            if response.get("ResponseMetadata").get("HTTPStatusCode", None) == 200:
-                serializer_data = {
-                    "queue_name": queue_name,
-                    "attributes": attributes,
-                    "queue_url": response.get("QueueUrl", None)
+            if not str(shard_count).isdecimal() or not 1 <= int(shard_count) <= settings.SHARD_MAX_COUNT:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "shard_count"
+                self.response_format["message"] = [messages.INVALID.format("shard_count")]
+                return Response(self.response_format)
+            shard_count = int(shard_count)
+
+            if not str(max_receive_count).isdecimal() or not 1 <= int(max_receive_count) <= MAX_RECEIVE_COUNT_LIMIT:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "max_receive_count"
+                self.response_format["message"] = [messages.INVALID.format("max_receive_count")]
+                return Response(self.response_format)
+
+            if shard_routing is not None and shard_routing not in dict(QueueModel.SHARD_ROUTING_CHOICES):
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "shard_routing"
+                self.response_format["message"] = [messages.INVALID.format("shard_routing")]
+                return Response(self.response_format)
+
+            if shard_count > 1:
+                queue = create_sharded_queue(
+                    sqs, queue_name, shard_count, shard_routing=shard_routing,
+                    region=region, profile=profile, max_receive_count=int(max_receive_count),
+                )
+                response = {
+                    "queue_object": self.get_serializer(queue).data,
+                    "shards": QueueShardSerializer(get_shards(queue), many=True).data,
                 }
-                queue_serializer = self.get_serializer(data=serializer_data)
-                if queue_serializer.is_valid(raise_exception=True):
-                    queue_serializer.save()
-                    response["queue_object"] = queue_serializer.data
+            else:
+                response, queue = create_standard_queue(
+                    sqs, queue_name, region=region, profile=profile, max_receive_count=int(max_receive_count)
+                )
+
+            if queue is not None:
+                response.setdefault("queue_object", self.get_serializer(queue).data)
 
                 self.response_format["status_code"] = status.HTTP_201_CREATED
                 self.response_format["data"] = response
                 self.response_format["error"] = None
                 self.response_format["message"] = [messages.CREATED.format("SQS Queue")]
 
+        except (LocationNotAllowed, ProfileNotFound, InvalidRegionError):
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "region/profile"
+            self.response_format["message"] = [messages.SQS_LOCATION_NOT_ALLOWED]
+
+        except sqs.exceptions.QueueDeletedRecently:
+            self.response_format["status_code"] = status.HTTP_404_NOT_FOUND
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue"
+            self.response_format["message"] = [messages.QUEUE_RECENTLY_DELETED]
+
+        except sqs.exceptions.QueueNameExists:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue creation"
+            self.response_format["message"] = [messages.QUEUE_EXIST]
+
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
+        return Response(self.response_format)
+
+
+class CreatePriorityQueueAPIView(CreateAPIView):
+    """
+    Class to create API for creating a priority queue made of weighted SQS queue lanes.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+    serializer_class = QueueSerializer
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(CreatePriorityQueueAPIView, self).__init__(**kwargs)
+
+    def post(self, request, *args, **kwargs):
+        """
+        Post method to create priority queue, one SQS queue per lane.
+        """
+        region = request.data.get("region") or sqs_router.local_region
+        profile = request.data.get("profile")
+
+        sqs = sqs_router.get_client()
+        try:
+            sqs = sqs_router.get_client(region=region, profile=profile)
+            queue_name = request.data.get("queue_name")
+            default_priority = request.data.get("default_priority")
+            lanes = clean_lanes(queue_name, request.data.get("lanes"), default_priority)
+            max_receive_count = request.data.get("max_receive_count", DEFAULT_MAX_RECEIVE_COUNT)
+
+            if lanes is None:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "lanes"
+                self.response_format["message"] = [messages.INVALID.format("lanes")]
+                return Response(self.response_format)
+
+            if not str(max_receive_count).isdecimal() or not 1 <= int(max_receive_count) <= MAX_RECEIVE_COUNT_LIMIT:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "max_receive_count"
+                self.response_format["message"] = [messages.INVALID.format("max_receive_count")]
+                return Response(self.response_format)
+
+            queue = create_priority_queue(
+                sqs, queue_name, lanes, default_priority=default_priority, region=region, profile=profile,
+                max_receive_count=int(max_receive_count),
+            )
+
+            self.response_format["status_code"] = status.HTTP_201_CREATED
+            self.response_format["data"] = {
+                "queue_object": self.get_serializer(queue).data,
+                "lanes": QueueLaneSerializer(get_lanes(queue), many=True).data,
+            }
+            self.response_format["error"] = None
+            self.response_format["message"] = [messages.CREATED.format("Priority Queue")]
+
+        except (LocationNotAllowed, ProfileNotFound, InvalidRegionError):
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "region/profile"
+            self.response_format["message"] = [messages.SQS_LOCATION_NOT_ALLOWED]
+
         except sqs.exceptions.QueueDeletedRecently:
             self.response_format["status_code"] = status.HTTP_404_NOT_FOUND
             self.response_format["data"] = None
@@ -92,6 +230,18 @@ class CreateStandardQueueAPIView(CreateAPIView):
             self.response_format["error"] = "Queue creation"
             self.response_format["message"] = [messages.QUEUE_EXIST]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
@@ -117,14 +267,12 @@ class SendMessageAPIView(CreateAPIView):
         """
         Post method to send message to queue.
         """
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
             queue = self.get_queryset()
+            producer_region = request.data.get("producer_region")
+            if producer_region:
+                queue = sqs_router.local_replica(queue, producer_region)
 
             message = {
                 "order_id": str(fake.random_number(digits=7)),
@@ -134,10 +282,38 @@ class SendMessageAPIView(CreateAPIView):
                 "sequence_id": request.data.get("sequence_id")
             }
 
+            routing_key = request.data.get("routing_key", message["order_id"])
+            priority = request.data.get("priority")
+            delay_seconds = request.data.get("delay_seconds", 10)
+            if not str(delay_seconds).isdecimal() or int(delay_seconds) > settings.SCHEDULER_MAX_DELAY_SECONDS:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "delay_seconds"
+                self.response_format["message"] = [messages.INVALID.format("delay_seconds")]
+                return Response(self.response_format)
+            delay_seconds = int(delay_seconds)
+
+            if delay_seconds > MAX_DELAY_SECONDS:
+                # SQS cannot delay this long, so the scheduler routes and sends it once it is due.
+                if queue.has_priority_lanes:
+                    select_lane(queue, priority)
+                scheduled = schedule_message(
+                    queue, json.dumps(message), timezone.now() + datetime.timedelta(seconds=delay_seconds),
+                    routing_key=routing_key, priority=priority,
+                )
+                self.response_format["status_code"] = status.HTTP_201_CREATED
+                self.response_format["data"] = {"scheduled_message_id": scheduled.id, "due_at": scheduled.due_at}
+                self.response_format["error"] = None
+                self.response_format["message"] = [messages.MESSAGE_SCHEDULED]
+                return Response(self.response_format)
+
+            queue = route_send_queue(queue, routing_key, priority)
+            sqs = sqs_router.client_for_queue(queue)
+
             response = sqs.send_message(
                 QueueUrl=queue.queue_url,
                 MessageBody=json.dumps(message),
-                DelaySeconds=10,
+                DelaySeconds=delay_seconds,
             )
             if response.get("ResponseMetadata").get("HTTPStatusCode", None) == 200:
 
@@ -158,12 +334,30 @@ class SendMessageAPIView(CreateAPIView):
             self.response_format["error"] = "Message"
             self.response_format["message"] = [messages.UNSUPPORTED_OPERATION]
 
+        except QueueLaneModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "priority"
+            self.response_format["message"] = [messages.INVALID.format("priority")]
+
         except QueueModel.DoesNotExist:
             self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
             self.response_format["data"] = None
             self.response_format["error"] = "Queue Object"
             self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
@@ -190,17 +384,13 @@ class ReceiveMessageAPIView(RetrieveAPIView):
         Get method for polling messages from queue.
         """
 
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
             queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
 
-            response = sqs.receive_message(
-                QueueUrl=queue.queue_url,
+            response = receive_messages(
+                queue,
                 AttributeNames=[
                     'Policy', 'VisibilityTimeout', 'MaximumMessageSize', 'MessageRetentionPeriod',
                     'ApproximateNumberOfMessages', 'CreatedTimestamp', 'LastModifiedTimestamp',
@@ -232,6 +422,18 @@ class ReceiveMessageAPIView(RetrieveAPIView):
             self.response_format["error"] = "Queue Object"
             self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
@@ -257,34 +459,40 @@ class DeleteMessageAPIView(DestroyAPIView):
         """
         Delete method to delete messages from queue.
         """
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
             queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
 
-            response = sqs.receive_message(
-                QueueUrl=queue.queue_url,
+            response = receive_messages(
+                queue,
                 AttributeNames=[
-                    'Policy', 'VisibilityTimeout', 'MaximumMessageSize', 'MessageRetentionPeriod', 'ApproximateNumberOfMessages', 'CreatedTimestamp', 'LastModifiedTimestamp', 'QueueArn', 'DelaySeconds', 'ReceiveMessageWaitTimeSeconds'
+                    'Policy', 'VisibilityTimeout', 'MaximumMessageSize', 'MessageRetentionPeriod', 'ApproximateNumberOfMessages', 'CreatedTimestamp', 'LastModifiedTimestamp', 'QueueArn', 'DelaySeconds', 'ReceiveMessageWaitTimeSeconds', 'SentTimestamp'
                 ],
                 MaxNumberOfMessages=10,
                 VisibilityTimeout=20,
                 WaitTimeSeconds=10,
             )
 
+            # Taken after the receive so the long-poll wait does not count as processing time.
+            received_at = timezone.now()
+
             if response.get("ResponseMetadata").get("HTTPStatusCode", None) == 200:
                 if len(response.get("Messages", [])) > 0:
                     message = response.get("Messages")[0]
+                    owner = owning_queue(queue, message)
+                    sqs = sqs_router.client_for_queue(owner)
 
                     delete_response = sqs.delete_message(
-                        QueueUrl=queue.queue_url,
+                        QueueUrl=owner.queue_url,
                         ReceiptHandle=message.get("ReceiptHandle")
                     )
                     if delete_response:
+                        ledger_writer.record(
+                            logical_queue_id(queue), message.get("MessageId"), received_at,
+                            sent_at=sent_timestamp(message),
+                        )
+
                         self.response_format["status_code"] = status.HTTP_201_CREATED
                         self.response_format["data"] = delete_response
                         self.response_format["error"] = None
@@ -318,6 +526,18 @@ class DeleteMessageAPIView(DestroyAPIView):
             self.response_format["error"] = "Queue Object"
             self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
@@ -344,14 +564,10 @@ class SetQueueAttributesAPIView(GenericAPIView):
         Patch method to set queue attributes.
         """
 
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
             queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
 
             attributes = {
                 "DelaySeconds": "20",
@@ -361,10 +577,14 @@ class SetQueueAttributesAPIView(GenericAPIView):
                 "VisibilityTimeout": "60"
             }
 
-            response = sqs.set_queue_attributes(
-                    QueueUrl=queue.queue_url,
-                    Attributes=attributes
-                )
+            # A logical queue left without shards or lanes has nothing to call.
+            response = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+            for physical_queue in physical_queues(queue):
+                sqs = sqs_router.client_for_queue(physical_queue)
+                response = sqs.set_queue_attributes(
+                        QueueUrl=physical_queue.queue_url,
+                        Attributes=attributes
+                    )
 
             if response.get("ResponseMetadata").get("HTTPStatusCode", None) == 200:
 
@@ -396,6 +616,18 @@ class SetQueueAttributesAPIView(GenericAPIView):
             self.response_format["error"] = "Queue Object"
             self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
@@ -422,16 +654,21 @@ class GetQueueUrlAPIView(GenericAPIView):
         Get method to get queue url.
         """
 
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
             queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
+
+            response = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+            queue_urls = []
+            for physical_queue in physical_queues(queue):
+                sqs = sqs_router.client_for_queue(physical_queue)
+                response = sqs.get_queue_url(QueueName=physical_queue.queue_name)
+                queue_urls.append(response.get("QueueUrl"))
 
-            response = sqs.get_queue_url(QueueName=queue.queue_name)
+            if is_logical(queue):
+                response.pop("QueueUrl", None)
+                response["QueueUrls"] = queue_urls
 
             if response.get("ResponseMetadata").get("HTTPStatusCode", None) == 200:
 
@@ -457,6 +694,18 @@ class GetQueueUrlAPIView(GenericAPIView):
             self.response_format["error"] = "Queue Object"
             self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
@@ -482,19 +731,19 @@ class DeleteQueueAPIView(GenericAPIView):
         """
         Delete method to delete queue.
         """
-        sqs = boto3.client(
-            'sqs',
-            region_name=os.getenv("AWS_REGION"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        sqs = sqs_router.get_client()
         try:
             queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
 
-            response = sqs.delete_queue(QueueUrl=queue.queue_url)
+            response = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+            for physical_queue in physical_queues(queue):
+                sqs = sqs_router.client_for_queue(physical_queue)
+                response = delete_standard_queue(sqs, physical_queue)
 
             if response.get("ResponseMetadata").get("HTTPStatusCode", None) == 200:
-                queue.delete()
+                if is_logical(queue):
+                    queue.delete()
 
                 self.response_format["status_code"] = status.HTTP_200_OK
                 self.response_format["data"] = response
@@ -518,12 +767,24 @@ class DeleteQueueAPIView(GenericAPIView):
             self.response_format["error"] = "Queue Object"
             self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
         return Response(self.response_format)
 
 
 class ReceiveLambdaMessageAPIView(CreateAPIView):
     """
-    Class to create API to receive messages from queue.
+    Class to create API to receive messages pushed by Lambda/SNS.
     """
     permission_classes = ()
     authentication_classes = ()
@@ -535,18 +796,446 @@ class ReceiveLambdaMessageAPIView(CreateAPIView):
         self.response_format = ResponseInfo().response
         super(ReceiveLambdaMessageAPIView, self).__init__(**kwargs)
 
+    def post(self, request, *args, **kwargs):
+        """
+        Post method to accept a pushed message and hand it to the webhook worker pool.
+        """
+        payload = request.data
+        if not isinstance(payload, dict) or not payload or not isinstance(payload.get("Records", []), list):
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Payload"
+            self.response_format["message"] = [messages.INVALID.format("Payload")]
+            return Response(self.response_format, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            webhook_pool.submit(dict(payload))
+
+            self.response_format["status_code"] = status.HTTP_202_ACCEPTED
+            self.response_format["data"] = None
+            self.response_format["error"] = None
+            self.response_format["message"] = [messages.MESSAGE_ACCEPTED]
+
+        except WorkerPoolFull:
+            self.response_format["status_code"] = status.HTTP_429_TOO_MANY_REQUESTS
+            self.response_format["data"] = None
+            self.response_format["error"] = "Webhook queue"
+            self.response_format["message"] = [messages.WEBHOOK_QUEUE_FULL]
+            return Response(
+                self.response_format,
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(settings.WEBHOOK_RETRY_AFTER_SECONDS)},
+            )
+
+        # The real HTTP status is returned so Lambda/SNS can tell accepted pushes from ones to retry.
+        return Response(self.response_format, status=status.HTTP_202_ACCEPTED)
+
+
+class ReceiveLambdaMessageStatsAPIView(GenericAPIView):
+    """
+    Class to create API to get queue depth and latency metrics of the webhook worker pool.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(ReceiveLambdaMessageStatsAPIView, self).__init__(**kwargs)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method to get webhook worker pool metrics.
+        """
+        self.response_format["status_code"] = status.HTTP_200_OK
+        self.response_format["data"] = webhook_pool.metrics()
+        self.response_format["error"] = None
+        self.response_format["message"] = [messages.SUCCESS]
+        return Response(self.response_format)
+
+
+class RedriveMessagesAPIView(GenericAPIView):
+    """
+    Class to create API to move messages from a queue's dead-letter queue back to the queue.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(RedriveMessagesAPIView, self).__init__(**kwargs)
+
     def get_queryset(self):
         queue_id = self.kwargs["pk"]
         return QueueModel.objects.get(id=queue_id)
 
     def post(self, request, *args, **kwargs):
         """
-        Get method for polling messages from queue.
+        Post method to redrive messages from the dead-letter queue.
+        """
+        sqs = sqs_router.get_client()
+        try:
+            queue = self.get_queryset()
+            sqs = bulk_router.client_for_queue(queue)
+
+            workers = int(request.data.get("workers", 4))
+            max_messages = int(request.data.get("max_messages", 1000))
+            rate_limit = request.data.get("rate_limit")
+            rate_limit = float(rate_limit) if rate_limit else None
+            if workers < 1 or max_messages < 1 or (rate_limit is not None and rate_limit <= 0):
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "Redrive"
+                self.response_format["message"] = [messages.INVALID.format("workers, max_messages or rate_limit")]
+                return Response(self.response_format)
+
+            result = redrive_queue(
+                sqs,
+                queue,
+                workers=min(workers, settings.REDRIVE_MAX_WORKERS),
+                max_messages=min(max_messages, settings.REDRIVE_MAX_MESSAGES),
+                rate_limit=rate_limit,
+            )
+            if result is None:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "Dead-letter queue"
+                self.response_format["message"] = [messages.NO_DEAD_LETTER_QUEUE]
+                return Response(self.response_format)
+
+            self.response_format["status_code"] = status.HTTP_200_OK
+            self.response_format["data"] = result
+            self.response_format["error"] = None
+            self.response_format["message"] = [
+                messages.REDRIVE_STOPPED_AT_DEADLINE if result["deadline_reached"] else messages.REDRIVE_COMPLETED
+            ]
+
+        except (TypeError, ValueError):
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Redrive"
+            self.response_format["message"] = [messages.INVALID_FORMAT]
+
+        except sqs.exceptions.QueueDoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS Queue"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("SQS Queue")]
+
+        except QueueModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue Object"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
+
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
+        return Response(self.response_format)
+
+
+class SendSyntheticOrdersAPIView(CreateAPIView):
+    """
+    Class to create API to send a bulk of synthetic orders to queue for load tests.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(SendSyntheticOrdersAPIView, self).__init__(**kwargs)
+
+    def get_queryset(self):
+        queue_id = self.kwargs["pk"]
+        return QueueModel.objects.get(id=queue_id)
+
+    def post(self, request, *args, **kwargs):
+        """
+        Post method to generate and send synthetic orders in batches.
+        """
+        sqs = sqs_router.get_client()
+        try:
+            queue = self.get_queryset()
+            sqs = bulk_router.client_for_queue(queue)
+
+            count = int(request.data.get("count", 1000))
+            workers = int(request.data.get("workers", 8))
+            rate_limit = request.data.get("rate_limit")
+            rate_limit = float(rate_limit) if rate_limit else None
+            seed = request.data.get("seed")
+            seed = int(seed) if seed is not None else None
+            if (
+                not 1 <= count <= settings.SYNTHETIC_MAX_COUNT
+                or not 1 <= workers <= settings.SYNTHETIC_MAX_WORKERS
+                or (rate_limit is not None and rate_limit <= 0)
+            ):
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "Synthetic orders"
+                self.response_format["message"] = [messages.INVALID.format("count, workers or rate_limit")]
+                return Response(self.response_format)
+
+            result = send_message_batches(
+                sqs,
+                [target.queue_url for target in send_targets(queue, request.data.get("priority"))],
+                iter_order_batches(count, sequence_id=request.data.get("sequence_id"), seed=seed),
+                workers=workers,
+                rate_limit=rate_limit,
+            )
+
+            self.response_format["status_code"] = status.HTTP_201_CREATED
+            self.response_format["data"] = result
+            self.response_format["error"] = None
+            self.response_format["message"] = [
+                messages.SYNTHETIC_ORDERS_STOPPED_AT_DEADLINE if result["deadline_reached"]
+                else messages.SYNTHETIC_ORDERS_SENT
+            ]
+
+        except (TypeError, ValueError):
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Synthetic orders"
+            self.response_format["message"] = [messages.INVALID_FORMAT]
+
+        except sqs.exceptions.InvalidMessageContents:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Message"
+            self.response_format["message"] = [messages.INVALID_MESSAGE_CONTENT]
+
+        except QueueLaneModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "priority"
+            self.response_format["message"] = [messages.INVALID.format("priority")]
+
+        except QueueModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue Object"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
+
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
+        return Response(self.response_format)
+
+
+class QueueStatsAPIView(GenericAPIView):
+    """
+    Class to create API to get message counts of queue, summed across shards for sharded queues.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(QueueStatsAPIView, self).__init__(**kwargs)
+
+    def get_queryset(self):
+        queue_id = self.kwargs["pk"]
+        return QueueModel.objects.get(id=queue_id)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method to get queue stats.
         """
+        sqs = sqs_router.get_client()
+        try:
+            queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
+
+            self.response_format["status_code"] = status.HTTP_200_OK
+            self.response_format["data"] = collect_queue_stats(queue)
+            self.response_format["error"] = None
+            self.response_format["message"] = [messages.SUCCESS]
+
+        except sqs.exceptions.QueueDoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS Queue"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("SQS Queue")]
+
+        except QueueModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue Object"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
+
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
+        return Response(self.response_format)
+
+
+class ReshardQueueAPIView(GenericAPIView):
+    """
+    Class to create API to change the number of shards behind a sharded queue.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(ReshardQueueAPIView, self).__init__(**kwargs)
+
+    def get_queryset(self):
+        queue_id = self.kwargs["pk"]
+        return QueueModel.objects.get(id=queue_id)
+
+    def post(self, request, *args, **kwargs):
+        """
+        Post method to reshard queue, calling it again retires draining shards once they are empty.
+        """
+        sqs = sqs_router.get_client()
+        try:
+            queue = self.get_queryset()
+            sqs = sqs_router.client_for_queue(queue)
+            shard_count = request.data.get("shard_count")
+            max_receive_count = request.data.get("max_receive_count", DEFAULT_MAX_RECEIVE_COUNT)
+
+            if queue.shard_routing is None:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "Queue"
+                self.response_format["message"] = [messages.QUEUE_NOT_SHARDED]
+                return Response(self.response_format)
+
+            if not str(shard_count).isdecimal() or not 1 <= int(shard_count) <= settings.SHARD_MAX_COUNT:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "shard_count"
+                self.response_format["message"] = [messages.INVALID.format("shard_count")]
+                return Response(self.response_format)
+
+            if not str(max_receive_count).isdecimal() or not 1 <= int(max_receive_count) <= MAX_RECEIVE_COUNT_LIMIT:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "max_receive_count"
+                self.response_format["message"] = [messages.INVALID.format("max_receive_count")]
+                return Response(self.response_format)
+
+            retired = reshard_queue(sqs, queue, int(shard_count), max_receive_count=int(max_receive_count))
+
+            self.response_format["status_code"] = status.HTTP_200_OK
+            self.response_format["data"] = {
+                "retired_shards": retired,
+                "shards": QueueShardSerializer(get_shards(queue), many=True).data,
+            }
+            self.response_format["error"] = None
+            self.response_format["message"] = [messages.SUCCESS]
+
+        except sqs.exceptions.QueueDeletedRecently:
+            self.response_format["status_code"] = status.HTTP_404_NOT_FOUND
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue"
+            self.response_format["message"] = [messages.QUEUE_RECENTLY_DELETED]
+
+        except QueueModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue Object"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
+
+        except CircuitOpenError:
+            self.response_format["status_code"] = status.HTTP_503_SERVICE_UNAVAILABLE
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_CIRCUIT_OPEN]
+
+        except DeadlineExceeded:
+            self.response_format["status_code"] = status.HTTP_504_GATEWAY_TIMEOUT
+            self.response_format["data"] = None
+            self.response_format["error"] = "SQS"
+            self.response_format["message"] = [messages.SQS_DEADLINE_EXCEEDED]
+
+        return Response(self.response_format)
+
+
+class LedgerSummaryAPIView(GenericAPIView):
+    """
+    Class to create API to get throughput and latency percentiles of processed messages from the ledger.
+    """
+    permission_classes = ()
+    authentication_classes = ()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor function for formatting the web response to return.
+        """
+        self.response_format = ResponseInfo().response
+        super(LedgerSummaryAPIView, self).__init__(**kwargs)
+
+    def get_queryset(self):
+        queue_id = self.kwargs["pk"]
+        return QueueModel.objects.get(id=queue_id)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method to summarize the ledger between the since and until query params, defaulting to the last hour.
+        """
+        try:
+            queue = self.get_queryset()
+
+            time_range = parse_time_range(request.query_params.get("since"), request.query_params.get("until"))
+
+            if time_range is None:
+                self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+                self.response_format["data"] = None
+                self.response_format["error"] = "Time range"
+                self.response_format["message"] = [messages.INVALID.format("Time range")]
+                return Response(self.response_format)
+
+            self.response_format["status_code"] = status.HTTP_200_OK
+            self.response_format["data"] = summarize_ledger(queue.id, *time_range)
+            self.response_format["error"] = None
+            self.response_format["message"] = [messages.SUCCESS]
+
+        except QueueModel.DoesNotExist:
+            self.response_format["status_code"] = status.HTTP_400_BAD_REQUEST
+            self.response_format["data"] = None
+            self.response_format["error"] = "Queue Object"
+            self.response_format["message"] = [messages.DOES_NOT_EXIST.format("Queue")]
 
-        print(request.data, datetime.datetime.now())
-        print("step - 1")
-        import time
-        time.sleep(60)
-        print("step - 2")
         return Response(self.response_format)
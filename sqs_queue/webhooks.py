@@ -0,0 +1,162 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from utilities.utils import percentile
+from .clients import sqs_router
+from .ledger import ledger_writer, sent_timestamp
+from .models import ProcessingLedgerModel, QueueModel
+from .profiling import maybe_profile
+from .sharding import logical_queue_id
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1000
+
+
+class WorkerPoolFull(Exception):
+    """
+    Exception raised when the webhook work queue cannot accept more payloads.
+    """
+
+
+class WebhookWorkerPool(object):
+    """
+    Class for processing webhook payloads on a fixed number of threads fed by a bounded queue.
+    """
+
+    def __init__(self, handler, workers, max_queue_size):
+        self.handler = handler
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.lock = threading.Lock()
+        self.threads = []
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.wait_times = deque(maxlen=LATENCY_WINDOW)
+        self.processing_times = deque(maxlen=LATENCY_WINDOW)
+
+    def _ensure_started(self):
+        # Threads are started on first use so management commands importing the views do not spawn them.
+        if self.threads:
+            return
+        with self.lock:
+            if self.threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name="webhook-worker-{}".format(index), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, payload):
+        """
+        Function to enqueue a payload without blocking, raising WorkerPoolFull when the queue is at capacity.
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((time.monotonic(), payload))
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            raise WorkerPoolFull()
+        with self.lock:
+            self.accepted += 1
+
+    def _work(self):
+        while True:
+            enqueued_at, payload = self.queue.get()
+            started_at = time.monotonic()
+            with self.lock:
+                self.in_flight += 1
+                self.wait_times.append(started_at - enqueued_at)
+            try:
+                with maybe_profile("webhook-consumer", settings.PROFILING_CONSUMER_SAMPLE_RATE,
+                                   {"worker": threading.current_thread().name}):
+                    self.handler(payload)
+                failed = False
+            except Exception:
+                logger.exception("Webhook payload processing failed.")
+                failed = True
+            with self.lock:
+                self.in_flight -= 1
+                self.processing_times.append(time.monotonic() - started_at)
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            self.queue.task_done()
+
+    def metrics(self):
+        with self.lock:
+            wait_times = list(self.wait_times)
+            processing_times = list(self.processing_times)
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "in_flight": self.in_flight,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_seconds_p50": percentile(wait_times, 0.5),
+                "wait_seconds_p95": percentile(wait_times, 0.95),
+                "processing_seconds_p50": percentile(processing_times, 0.5),
+                "processing_seconds_p95": percentile(processing_times, 0.95),
+            }
+
+
+def process_lambda_message(payload):
+    """
+    Function to process a message pushed by Lambda/SNS.
+    """
+    received_at = timezone.now()
+    logger.debug("Processing Lambda message: %s", payload)
+
+    records = payload.get("Records", [])
+    status = ProcessingLedgerModel.FAILED
+    try:
+        time.sleep(settings.LAMBDA_MESSAGE_PROCESSING_SECONDS)
+        status = ProcessingLedgerModel.COMPLETED
+    finally:
+        queue_id = _source_queue_id(records)
+        for record in records:
+            message_id = record.get("messageId") or record.get("Sns", {}).get("MessageId")
+            if message_id is None:
+                continue
+            sent_at = sent_timestamp({"Attributes": record.get("attributes", {})})
+            ledger_writer.record(queue_id, message_id, received_at, status=status, sent_at=sent_at)
+
+
+def _source_queue_id(records):
+    """
+    Function to find the logical queue an SQS-triggered Lambda event came from, using the region and name in its
+    eventSourceARN.
+    """
+    source_arn = records[0].get("eventSourceARN") if records else None
+    if not source_arn or source_arn.count(":") < 5:
+        return None
+    _, _, _, region, _, queue_name = source_arn.split(":", 5)
+
+    region_filter = Q(region=region)
+    if region == sqs_router.local_region:
+        region_filter |= Q(region__isnull=True)
+    queue = QueueModel.objects.filter(region_filter, queue_name=queue_name).first()
+    return logical_queue_id(queue) if queue is not None else None
+
+
+webhook_pool = WebhookWorkerPool(
+    process_lambda_message,
+    workers=settings.WEBHOOK_WORKERS,
+    max_queue_size=settings.WEBHOOK_QUEUE_SIZE,
+)
@@ -13,3 +13,17 @@ DELETED = "{} deleted successfully."
 NOT_FOUND = "{} not found."
 SUCCESS = "SUCCESS."
 NO_MESSAGES = "No messages found."
+NO_DEAD_LETTER_QUEUE = "Queue has no dead-letter queue."
+REDRIVE_COMPLETED = "Redrive completed."
+SYNTHETIC_ORDERS_SENT = "Synthetic orders sent."
+REDRIVE_STOPPED_AT_DEADLINE = "Redrive stopped at the request deadline, use the redrive_dlq command for large backlogs."
+SYNTHETIC_ORDERS_STOPPED_AT_DEADLINE = (
+    "Synthetic orders stopped at the request deadline, use the send_synthetic_orders command for large loads."
+)
+QUEUE_NOT_SHARDED = "Queue is not sharded."
+MESSAGE_ACCEPTED = "Message accepted for processing."
+WEBHOOK_QUEUE_FULL = "Too many messages in progress, retry later."
+SQS_CIRCUIT_OPEN = "SQS is unavailable for this queue, retry later."
+SQS_DEADLINE_EXCEEDED = "Request deadline exceeded while waiting on SQS."
+MESSAGE_SCHEDULED = "Message scheduled successfully."
+SQS_LOCATION_NOT_ALLOWED = "Region or profile is not allowed."
@@ -1,3 +1,7 @@
+import threading
+import time
+
+
 class ResponseInfo(object):
     """
     Class for setting how API should send response.
@@ -9,4 +13,43 @@ class ResponseInfo(object):
             "error": args.get("error", None),
             "data": args.get("data", []),
             "message": [args.get("message", "Success")],
-        }
\ No newline at end of file
+        }
+
+
+class RateLimiter(object):
+    """
+    Class for capping throughput across threads with a token bucket.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(max(burst or rate, 1))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Function to block until the requested number of tokens is available.
+        """
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def percentile(values, fraction):
+    """
+    Function to return the nearest-rank percentile of values, or None when there are none.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]